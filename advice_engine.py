@@ -0,0 +1,181 @@
+# scoreboard_monitor/advice_engine.py
+
+import math
+from collections import deque
+from typing import Dict, Any, List, Iterable
+
+from config import LOSS_HISTORY_ROUNDS
+
+# Sotto questa perdita media per round un servizio non viene considerato per lo shutdown
+MIN_AVERAGE_LOSS = 0.01
+# Numero minimo di round osservati per stimare il trend delle perdite
+MIN_TREND_SAMPLES = 3
+
+class ServiceLossState:
+    """
+    Stato incrementale delle perdite di un servizio: ring buffer degli ultimi `window` round con
+    somma corrente, media e varianza sull'intera serie (Welford) e somme per la regressione
+    lineare del trend. Ogni aggiornamento costa O(1).
+    """
+
+    __slots__ = ('window', 'values', 'recent', 'recent_sum', 'count', 'mean', 'm2', 'sum_t', 'sum_tt', 'sum_ty')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: List[float] = []   # serie completa, dal round più vecchio al più recente
+        self.recent = deque(maxlen=window)
+        self.recent_sum = 0.0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_ty = 0.0
+
+    def add(self, loss: float):
+        if len(self.recent) == self.window:
+            self.recent_sum -= self.recent[0]
+        self.recent.append(loss)
+        self.recent_sum += loss
+        self.values.append(loss)
+
+        t = self.count
+        self.count += 1
+        delta = loss - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (loss - self.mean)
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_ty += t * loss
+
+    @property
+    def recent_average(self) -> float:
+        return self.recent_sum / len(self.recent) if self.recent else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def trend(self) -> float:
+        """Variazione stimata della perdita per round (pendenza della regressione sulla serie completa)."""
+        if self.count < MIN_TREND_SAMPLES:
+            return 0.0
+        n = self.count
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator == 0:
+            return 0.0
+        return (n * self.sum_ty - self.sum_t * self.mean * n) / denominator
+
+    def project_loss(self, rounds_ahead: int) -> float:
+        """Perdita totale attesa nei prossimi `rounds_ahead` round, seguendo livello recente e trend."""
+        level, slope = self.recent_average, self.trend
+        if slope >= 0 or level <= 0:
+            return max(0.0, rounds_ahead * level + slope * rounds_ahead * (rounds_ahead + 1) / 2)
+        # Con trend negativo la perdita per round si azzera dopo level / |slope| round
+        active_rounds = min(rounds_ahead, int(level / -slope))
+        return max(0.0, active_rounds * level + slope * active_rounds * (active_rounds + 1) / 2)
+
+class ShutdownAdvisor:
+    """
+    Motore incrementale dei consigli di shutdown. Lo storico delle perdite viene aggiornato una
+    volta per round in O(1) per servizio; i consigli sono calcolati al più una volta per round e
+    riutilizzati nei ridisegni.
+    """
+
+    def __init__(self, window: int = LOSS_HISTORY_ROUNDS):
+        self.window = window
+        self.services: Dict[str, ServiceLossState] = {}
+        self.last_round = None
+        self._version = 0
+        self._advice_cache_key = None
+        self._advice_cache_team = None
+        self._advice_cache: Dict[str, str] = {}
+
+    @classmethod
+    def from_history(cls, loss_history: Dict[str, List[float]], window: int = LOSS_HISTORY_ROUNDS) -> "ShutdownAdvisor":
+        """Costruisce il motore da uno storico delle perdite (liste dal round più recente al più vecchio)."""
+        advisor = cls(window)
+        advisor.seed(loss_history)
+        return advisor
+
+    def _state(self, s_name: str) -> ServiceLossState:
+        state = self.services.get(s_name)
+        if state is None:
+            state = self.services[s_name] = ServiceLossState(self.window)
+        return state
+
+    def update(self, round_number: int, team_data: Dict[str, Any]):
+        """Registra le perdite dei servizi per un nuovo round; i round già registrati vengono ignorati."""
+        if not team_data or not team_data.get('services'):
+            return
+        if self.last_round is not None and round_number <= self.last_round:
+            return
+        for s_name, s_data in team_data['services'].items():
+            self._state(s_name).add(abs(s_data['defense_score_delta']))
+        self.last_round = round_number
+        self._version += 1
+
+    def seed(self, loss_history: Dict[str, List[float]]):
+        """
+        Antepone alla serie live uno storico di round precedenti (liste dal più recente al più
+        vecchio), ricostruendo lo stato dei servizi coinvolti.
+        """
+        for s_name, older in loss_history.items():
+            live_values = self.services[s_name].values if s_name in self.services else []
+            state = ServiceLossState(self.window)
+            for loss in _chronological(older, live_values):
+                state.add(loss)
+            self.services[s_name] = state
+        self._version += 1
+
+    def advise(self, team_data: Dict[str, Any], status_data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Per ogni servizio confronta il punteggio finale stimato restando online (perdite proiettate
+        con livello recente, trend e deviazione standard) con quello ottenuto spegnendolo.
+        """
+        if not team_data or not status_data or not team_data.get('services'):
+            return {}
+        cache_key = (status_data.get('scoreboardRound'), status_data.get('rounds'), self._version)
+        if cache_key == self._advice_cache_key and team_data is self._advice_cache_team:
+            return self._advice_cache
+
+        advice = {}
+        current_round = status_data.get('scoreboardRound')
+        total_rounds = status_data.get('rounds')
+        if current_round is not None and total_rounds is not None and current_round < total_rounds:
+            remaining_rounds = total_rounds - current_round
+            for s_name, s_data in team_data['services'].items():
+                message = self._advise_service(s_name, s_data, remaining_rounds, total_rounds)
+                if message:
+                    advice[s_name] = message
+
+        self._advice_cache_key, self._advice_cache_team, self._advice_cache = cache_key, team_data, advice
+        return advice
+
+    def _advise_service(self, s_name: str, s_data: Dict[str, Any], remaining_rounds: int, total_rounds: int) -> str | None:
+        state = self.services.get(s_name)
+        if state is None or not state.recent or state.recent_average < MIN_AVERAGE_LOSS:
+            return None
+
+        current_service_score = s_data['score']
+        sla_factor = s_data['sla'] / 100.0
+        estimated_future_loss_if_up = state.project_loss(remaining_rounds)
+        final_score_if_up = (current_service_score - estimated_future_loss_if_up) * sla_factor
+        uncertainty = state.std * math.sqrt(remaining_rounds) * sla_factor
+
+        current_up_ticks = s_data.get('successfulChecks', 0)
+        final_sla_if_down = (current_up_ticks / total_rounds) * 100
+        final_score_if_down = current_service_score * (final_sla_if_down / 100.0)
+
+        if final_score_if_down <= final_score_if_up:
+            return None
+        return (
+            f"Valutare shutdown (media su {len(state.recent)} round, trend {state.trend:+.2f}/round). "
+            f"Stima punteggio finale con shutdown: {final_score_if_down:,.0f}. "
+            f"Stima se online: {final_score_if_up:,.0f} (±{uncertainty:,.0f})."
+        )
+
+def _chronological(newest_first: List[float], live_values: List[float]) -> Iterable[float]:
+    yield from reversed(newest_first)
+    yield from live_values
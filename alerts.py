@@ -0,0 +1,167 @@
+# scoreboard_monitor/alerts.py
+
+import re
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable
+from collections.abc import Mapping
+
+import metrics
+from config import (
+    ALERT_MESSAGE_MAX_CHARS, ALERT_MESSAGE_CACHE_SIZE, ALERT_REMINDER_ROUNDS,
+    ALERT_MIN_INTERVAL_SECONDS, ALERT_COMMAND
+)
+
+_TERMINAL_ESCAPE_RE = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]')
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f]')
+
+# Messaggi già elaborati, indicizzati per digest dell'output: la cache non trattiene gli output completi
+_message_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_message_cache_lock = threading.Lock()
+
+def checker_message(stdout: str | None) -> str:
+    """
+    Messaggio mostrabile per l'output di un checker fallito: senza sequenze di escape né caratteri
+    di controllo, su una sola riga e lungo al più ALERT_MESSAGE_MAX_CHARS caratteri. Un output più
+    lungo viene troncato e marcato con la lunghezza e un hash del testo completo, così output
+    diversi con lo stesso inizio restano distinguibili. Lo stesso output, ripetuto a ogni round,
+    viene elaborato una sola volta e restituisce sempre la stessa stringa.
+    """
+    raw = stdout or ''
+    digest = hashlib.blake2b(raw.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+    with _message_cache_lock:
+        cached = _message_cache.get(digest)
+        if cached is not None:
+            _message_cache.move_to_end(digest)
+            return cached
+    message = _clean_message(raw, digest)
+    with _message_cache_lock:
+        message = _message_cache.setdefault(digest, message)
+        while len(_message_cache) > ALERT_MESSAGE_CACHE_SIZE:
+            _message_cache.popitem(last=False)
+    return message
+
+def _clean_message(raw: str, digest: bytes) -> str:
+    # Viene ripulito solo l'inizio dell'output: il resto non verrebbe comunque mostrato
+    head = raw[:ALERT_MESSAGE_MAX_CHARS * 4]
+    text = ' '.join(_CONTROL_CHARS_RE.sub(' ', _TERMINAL_ESCAPE_RE.sub('', head)).split())
+    if len(head) == len(raw) and len(text) <= ALERT_MESSAGE_MAX_CHARS:
+        return text or 'Errore sconosciuto'
+    return f"{text[:ALERT_MESSAGE_MAX_CHARS].rstrip()}… [{len(raw)} caratteri, #{digest.hex()[:8]}]"
+
+class AlertTracker:
+    """
+    Stato dei servizi in errore, round dopo round. update() restituisce solo le transizioni:
+    'down' quando un servizio inizia a fallire, 'recovered' quando torna funzionante e
+    'still_down' come promemoria, ogni ALERT_REMINDER_ROUNDS round, finché resta in errore.
+    Un messaggio diverso dal round precedente non genera un avviso (molti checker includono
+    nell'output flag id o orari che cambiano a ogni round): viene solo aggiornato e riportato
+    nel promemoria successivo.
+    """
+
+    def __init__(self, reminder_rounds: int = ALERT_REMINDER_ROUNDS):
+        self.reminder_rounds = reminder_rounds
+        # servizio -> {'since': round di inizio, 'message': ultimo messaggio, 'notified': round dell'ultimo avviso}
+        self.down: Dict[str, Dict[str, Any]] = {}
+        self.last_round = None
+
+    def update(self, round_number: int, failing_services: Mapping) -> List[Dict[str, Any]]:
+        if self.last_round is not None and round_number <= self.last_round:
+            if round_number == self.last_round:
+                return []  # stesso round visualizzato di nuovo (ridisegno, nuovo client)
+            self.down = {}  # round all'indietro: nuova partita
+        self.last_round = round_number
+        events = []
+        for service, message in failing_services.items():
+            state = self.down.get(service)
+            if state is None:
+                self.down[service] = {'since': round_number, 'message': message, 'notified': round_number}
+                events.append(self._event('down', service, round_number, message, round_number))
+                continue
+            state['message'] = message
+            if self.reminder_rounds > 0 and round_number - state['notified'] >= self.reminder_rounds:
+                state['notified'] = round_number
+                events.append(self._event('still_down', service, round_number, message, state['since']))
+        for service in [s for s in self.down if s not in failing_services]:
+            state = self.down.pop(service)
+            events.append(self._event('recovered', service, round_number, state['message'], state['since']))
+        return events
+
+    @staticmethod
+    def _event(kind: str, service: str, round_number: int, message: str, since: int) -> Dict[str, Any]:
+        return {'kind': kind, 'service': service, 'round': round_number, 'message': message, 'since': since}
+
+def format_event(event: Dict[str, Any]) -> str:
+    service, since = event['service'], event['since']
+    if event['kind'] == 'down':
+        return f"{service} in errore dal round {event['round']}: {event['message']}"
+    if event['kind'] == 'still_down':
+        return f"{service} ancora in errore (dal round {since}): {event['message']}"
+    return f"{service} ripristinato al round {event['round']} (in errore dal round {since})"
+
+class AlertDispatcher:
+    """
+    Consegna degli avvisi in un thread dedicato, fuori dal percorso di rendering. Gli eventi in
+    attesa sono tenuti per servizio (un servizio che cambia stato più volte conta come un solo
+    avviso, con lo stato più recente) e vengono consegnati insieme, al più una volta ogni
+    `min_interval` secondi: la memoria occupata e il numero di notifiche restano limitati
+    qualunque sia il numero di eventi prodotti dai checker.
+    """
+
+    def __init__(self, bell: Callable[[], None] | None = None, command: List[str] | None = ALERT_COMMAND, min_interval: float = ALERT_MIN_INTERVAL_SECONDS):
+        self.bell = bell
+        self.command = command
+        self.min_interval = min_interval
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def start(self) -> "AlertDispatcher":
+        self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, events: List[Dict[str, Any]]):
+        """Accoda gli eventi senza attendere la consegna."""
+        if not events:
+            return
+        with self._condition:
+            for event in events:
+                self._pending[event['service']] = event
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                batch = list(self._pending.values())
+                self._pending = {}
+            self._deliver(batch)
+            # Intervallo minimo tra due notifiche: gli eventi arrivati nel frattempo vengono accorpati
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, self.min_interval)
+
+    def _deliver(self, batch: List[Dict[str, Any]]):
+        if self._closed:
+            return
+        metrics.count('alerts_notified', len(batch))
+        if self.bell is not None and any(event['kind'] != 'recovered' for event in batch):
+            self.bell()
+        if self.command:
+            text = '\n'.join(format_event(event) for event in batch)
+            try:
+                subprocess.run([*self.command, text], timeout=10, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except (OSError, subprocess.SubprocessError):
+                metrics.count('alerts_command_errors')
@@ -0,0 +1,160 @@
+# scoreboard_monitor/analytics.py
+
+from bisect import bisect_left, insort
+from typing import Dict, Any, List
+
+import numpy as np
+
+from columnar import FIELD_INDEX
+from config import ANALYTICS_TOP_K, ANALYTICS_WINDOW_ROUNDS
+
+class _Ranking:
+    """
+    Classifica ordinata (valore, team) mantenuta con ricerca binaria: aggiornare un team costa
+    O(log n) confronti più lo spostamento in memoria della lista, senza riordinare tutto.
+    """
+
+    __slots__ = ('_entries', '_values')
+
+    def __init__(self):
+        self._entries: List[tuple] = []
+        self._values: Dict[int, float] = {}
+
+    def update(self, team: int, value: float):
+        old = self._values.get(team)
+        if old == value:
+            return
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (old, team))]
+        if value > 0:
+            insort(self._entries, (value, team))
+            self._values[team] = value
+        else:
+            self._values.pop(team, None)
+
+    def top(self, k: int) -> List[tuple]:
+        """I `k` team con valore più alto, come coppie (team, valore) in ordine decrescente."""
+        return [(team, value) for value, team in reversed(self._entries[-k:])] if k > 0 else []
+
+class ScoreboardAnalytics:
+    """
+    Analisi dell'intero tabellone, aggiornata incrementalmente a ogni round da un GameHistory:
+    per ogni servizio le classifiche dei team che rubano più flag (attaccanti) e di quelli che
+    ne perdono di più (vittime), il first blood, e le variazioni di posizione in classifica.
+    Ad ogni round vengono toccate solo le celle (team, servizio) i cui contatori sono cambiati.
+    Il riepilogo riporta anche i team con più punti d'attacco guadagnati negli ultimi `window` round.
+    """
+
+    def __init__(self, top_k: int = ANALYTICS_TOP_K, window: int = ANALYTICS_WINDOW_ROUNDS):
+        self.top_k = top_k
+        self.window = window
+        self.attackers: Dict[int, _Ranking] = {}
+        self.victims: Dict[int, _Ranking] = {}
+        # servizio -> (team, round) della prima flag rubata osservata
+        self.first_blood: Dict[int, tuple] = {}
+        # team -> posizioni guadagnate (positive) o perse (negative) nell'ultimo round
+        self.position_deltas: Dict[int, int] = {}
+        self.last_round = None
+        self._round_stolen: Dict[tuple, float] = {}
+        self._round_lost: Dict[tuple, float] = {}
+        self._history = None
+
+    def _ranking(self, rankings: Dict[int, _Ranking], s: int) -> _Ranking:
+        ranking = rankings.get(s)
+        if ranking is None:
+            ranking = rankings[s] = _Ranking()
+        return ranking
+
+    def update(self, history, round_number: int):
+        """Integra il round indicato, già aggiunto allo storico."""
+        if self.last_round is not None and round_number <= self.last_round:
+            return
+        self._history = history
+        current = history.table(round_number)
+        previous_round = history.previous_round(round_number)
+        # Senza il round precedente (primo round osservato o buco) si riparte dai valori cumulativi;
+        # il round 1 è comunque incrementale, perché prima di esso tutti i contatori sono a zero
+        game_start = self.last_round is None and previous_round is None and round_number == 1
+        incremental = game_start or (previous_round is not None and previous_round == self.last_round)
+        previous = history.table(previous_round) if incremental and not game_start else np.zeros_like(current)
+
+        stolen, lost = current[FIELD_INDEX['stolen']], current[FIELD_INDEX['lost']]
+        prev_stolen, prev_lost = previous[FIELD_INDEX['stolen']], previous[FIELD_INDEX['lost']]
+        stolen_delta, lost_delta = stolen - prev_stolen, lost - prev_lost
+
+        self._round_stolen, self._round_lost = {}, {}
+        for t, s in zip(*np.nonzero(stolen_delta)):
+            t, s = int(t), int(s)
+            self._ranking(self.attackers, s).update(t, float(stolen[t, s]))
+            self._round_stolen[(t, s)] = float(stolen_delta[t, s])
+        for t, s in zip(*np.nonzero(lost_delta)):
+            t, s = int(t), int(s)
+            self._ranking(self.victims, s).update(t, float(lost[t, s]))
+            self._round_lost[(t, s)] = float(lost_delta[t, s])
+
+        if incremental:
+            self._detect_first_blood(round_number, prev_stolen)
+        if incremental and not game_start:
+            self._update_positions(history, round_number, previous_round)
+        self.last_round = round_number
+
+    def _detect_first_blood(self, round_number: int, prev_stolen: np.ndarray):
+        """Un servizio senza flag rubate nel round precedente che ne ha ora: vince chi ne ha rubate di più."""
+        candidates: Dict[int, tuple] = {}
+        for (t, s), delta in self._round_stolen.items():
+            if s in self.first_blood or delta <= 0:
+                continue
+            best = candidates.get(s)
+            if best is None or delta > best[1]:
+                candidates[s] = (t, delta)
+        for s, (t, _) in candidates.items():
+            if not prev_stolen[:, s].any():
+                self.first_blood[s] = (t, round_number)
+
+    def _update_positions(self, history, round_number: int, previous_round: int):
+        teams = len(history.team_names)
+        now = history.team_positions[round_number, :teams]
+        before = history.team_positions[previous_round, :teams]
+        comparable = history.team_present[round_number, :teams] & history.team_present[previous_round, :teams]
+        changed = np.flatnonzero(comparable & (now != before))
+        self.position_deltas = {int(t): int(before[t] - now[t]) for t in changed}
+
+    def summary(self) -> Dict[str, Any]:
+        """Dati del pannello: per servizio attaccanti, vittime e first blood; team con le variazioni di posizione maggiori."""
+        history = self._history
+        if history is None:
+            return {}
+        names = history.team_names
+        window_metrics = history.window_metrics(self.last_round, self.window)
+        services = {}
+        for s, s_name in enumerate(history.service_names):
+            attackers = self.attackers.get(s)
+            victims = self.victims.get(s)
+            first_blood = self.first_blood.get(s)
+            services[s_name] = {
+                'attackers': [
+                    (names[t], int(value), int(self._round_stolen.get((t, s), 0)))
+                    for t, value in (attackers.top(self.top_k) if attackers else [])
+                ],
+                'victims': [
+                    (names[t], int(value), int(self._round_lost.get((t, s), 0)))
+                    for t, value in (victims.top(self.top_k) if victims else [])
+                ],
+                'first_blood': (names[first_blood[0]], first_blood[1]) if first_blood else None,
+                'recent_attackers': self._recent_attackers(window_metrics, s),
+            }
+        movers = sorted(self.position_deltas.items(), key=lambda item: (-abs(item[1]), item[0]))[:self.top_k]
+        return {
+            'round': self.last_round,
+            'window': self.window if window_metrics is not None else None,
+            'services': services,
+            'movers': [(names[t], delta, int(history.team_positions[self.last_round, t])) for t, delta in movers],
+        }
+
+    def _recent_attackers(self, window_metrics: Dict[str, np.ndarray] | None, s: int) -> List[tuple]:
+        """Fino a `top_k` coppie (team, punti) con più punti d'attacco guadagnati nella finestra."""
+        if window_metrics is None:
+            return []
+        gained = window_metrics['attack_score_delta'][:, s]
+        best = np.argsort(-gained, kind='stable')[:self.top_k]
+        return [(self._history.team_names[t], float(gained[t])) for t in best if gained[t] > 0]
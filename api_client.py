@@ -2,29 +2,266 @@
 
 import requests
 import json
-from config import BASE_URL, SCOREBOARD_ENDPOINT, STATUS_ENDPOINT, COLOR_RED, COLOR_RESET
+import time
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Collection
 
-def _fetch_json(endpoint: str) -> dict | None:
-    """Funzione helper per effettuare richieste GET e gestire errori comuni."""
+import json_stream
+import metrics
+from resilience import Backoff, CircuitBreaker
+from config import (
+    BASE_URL, SCOREBOARD_ENDPOINT, STATUS_ENDPOINT, HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS, HTTP_REQUEST_DEADLINE_SECONDS, RETRY_MAX_ATTEMPTS, SCOREBOARD_STREAM_CHUNK_BYTES, COLOR_RED, COLOR_YELLOW, COLOR_RESET
+)
+
+# Sessione condivisa: riusa le connessioni TCP (keep-alive) tra una richiesta e l'altra
+_session = None
+# Ultime risposte delle richieste da revalidare (solo /status): url -> (etag, last_modified, dati).
+# I tabelloni non vi entrano: i tick conclusi sono serviti dalla cache dei round e non vengono
+# mai richiesti di nuovo, e tenerne in memoria i corpi decodificati costerebbe decine di MB
+_response_cache = {}
+# Pool di thread per le richieste concorrenti (stato + tick corrente/precedente)
+_executor = None
+# Cache su disco dei tabelloni dei round conclusi (vedi round_cache.RoundCache)
+_round_cache = None
+# Ultimo scoreboardRound restituito da /status: i tick fino a questo sono definitivi
+_last_scoreboard_round = None
+# Interruttore delle richieste live: con l'API giù si smette di attendere i timeout
+_breaker = CircuitBreaker()
+# Interruttore separato per il lavoro in background (backfill): i suoi errori non devono
+# sospendere le richieste del tick live
+_background_breaker = CircuitBreaker()
+
+class _RetryableError(Exception):
+    """Risposta 5xx: il server è raggiungibile ma momentaneamente in errore."""
+
+def _get_session() -> requests.Session:
+    """Restituisce la sessione HTTP condivisa, creandola al primo utilizzo."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        _session = session
+    return _session
+
+def _conditional_headers(cache_key: str | None) -> dict:
+    """Costruisce gli header If-None-Match/If-Modified-Since per una risposta già in cache."""
+    cached = _response_cache.get(cache_key) if cache_key is not None else None
+    if not cached:
+        return {}
+    etag, last_modified, _ = cached
+    headers = {}
+    if etag: headers['If-None-Match'] = etag
+    if last_modified: headers['If-Modified-Since'] = last_modified
+    return headers
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Restituisce il pool di thread condiviso per le richieste concorrenti."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='api')
+    return _executor
+
+def _read_selective(response: requests.Response, teams: Collection[str], raw_body: list | None) -> dict:
+    """Legge il corpo a blocchi, materializzando con json_stream solo i team richiesti."""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    parser = json_stream.SelectiveScoreboardParser(teams)
+    for chunk in response.iter_content(SCOREBOARD_STREAM_CHUNK_BYTES):
+        if raw_body is not None: raw_body.append(chunk)
+        parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b'', final=True))
+    return parser.close()
+
+def _fetch_json(
+    endpoint: str,
+    report_errors: bool = True,
+    teams: Collection[str] | None = None,
+    raw_body: list | None = None,
+    revalidate: bool = False,
+    background: bool = False
+) -> dict | None:
+    """
+    Funzione helper per effettuare richieste GET e gestire errori comuni.
+    Errori di rete, timeout e risposte 5xx vengono ritentati con backoff esponenziale, entro
+    HTTP_REQUEST_DEADLINE_SECONDS complessivi; con l'interruttore aperto la richiesta non viene
+    inviata affatto. Con `background` si usa l'interruttore del lavoro in background.
+    Con `teams` la risposta viene letta in streaming e decodificata solo per quei team;
+    se `raw_body` è una lista, vi vengono accodati i byte del corpo ricevuto.
+    Con `revalidate` l'ultima risposta viene conservata e richiesta di nuovo in modo condizionale.
+    """
     url = f"{BASE_URL}{endpoint}"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"{COLOR_RED}Errore di connessione all'API ({url}): {e}{COLOR_RESET}")
-    except json.JSONDecodeError:
-        print(f"{COLOR_RED}Errore nel decodificare la risposta JSON da {url}{COLOR_RESET}")
+    cache_key = url if revalidate else None
+    breaker = _background_breaker if background else _breaker
+    backoff = Backoff()
+    deadline = time.monotonic() + HTTP_REQUEST_DEADLINE_SECONDS
+    error = None
+    for attempt in range(RETRY_MAX_ATTEMPTS):
+        if attempt > 0:
+            delay = backoff.next_delay()
+            if time.monotonic() + delay >= deadline:
+                break
+            metrics.count('http_retries_total')
+            time.sleep(delay)
+        if not breaker.allow():
+            if report_errors:
+                print(f"{COLOR_YELLOW}API non raggiungibile: nuovo tentativo tra {breaker.retry_after():.0f}s ({url}){COLOR_RESET}")
+            return None
+        if raw_body is not None:
+            raw_body.clear()
+        # Ogni tentativo dispone solo del tempo rimasto prima della scadenza complessiva
+        remaining = deadline - time.monotonic()
+        timeout = (min(HTTP_CONNECT_TIMEOUT_SECONDS, remaining), min(HTTP_READ_TIMEOUT_SECONDS, remaining))
+        try:
+            data = _request_json(url, cache_key, teams, raw_body, timeout)
+            breaker.record_success()
+            return data
+        except requests.exceptions.HTTPError as e:
+            # 4xx (es. tick non ancora pubblicato): il server risponde, inutile ritentare
+            breaker.record_success()
+            metrics.count('http_errors_total')
+            if report_errors: print(f"{COLOR_RED}Errore di connessione all'API ({url}): {e}{COLOR_RESET}")
+            return None
+        except (requests.exceptions.RequestException, _RetryableError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            error = e
+            metrics.count('http_errors_total')
+            if breaker.record_failure():
+                metrics.count('circuit_open_total')
+                break
+    if report_errors:
+        if isinstance(error, (json.JSONDecodeError, UnicodeDecodeError)):
+            print(f"{COLOR_RED}Errore nel decodificare la risposta JSON da {url}{COLOR_RESET}")
+        else:
+            print(f"{COLOR_RED}Errore di connessione all'API ({url}): {error}{COLOR_RESET}")
     return None
 
-def fetch_scoreboard_data(tick_number: int) -> dict | None:
+def _request_json(url: str, cache_key: str | None, teams: Collection[str] | None, raw_body: list | None, timeout: tuple) -> dict:
+    """Singolo tentativo di richiesta, con revalidazione condizionale tramite la cache delle risposte."""
+    response = _get_session().get(
+        url, headers=_conditional_headers(cache_key), timeout=timeout, stream=teams is not None
+    )
+    with response:
+        metrics.count('http_requests_total')
+        if response.status_code == 304 and cache_key in _response_cache:
+            # Nessuna modifica: si riusa il corpo già decodificato
+            metrics.count('http_not_modified_total')
+            return _response_cache[cache_key][2]
+        if response.status_code >= 500:
+            raise _RetryableError(f"{response.status_code} {response.reason}")
+        response.raise_for_status()
+        with metrics.span('decode'):
+            if teams is not None:
+                data = _read_selective(response, teams, raw_body)
+            else:
+                data = response.json()
+                if raw_body is not None: raw_body.append(response.content)
+        if metrics.enabled():
+            metrics.count('http_bytes_total', response.raw.tell() if hasattr(response.raw, 'tell') else len(response.content))
+    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+    if cache_key is not None and (etag or last_modified):
+        _response_cache[cache_key] = (etag, last_modified, data)
+    return data
+
+def api_unavailable() -> bool:
+    """True se l'interruttore è aperto, cioè l'API è considerata momentaneamente irraggiungibile."""
+    return _breaker.state == CircuitBreaker.OPEN
+
+def set_round_cache(cache) -> None:
+    """Imposta la cache su disco consultata prima di scaricare un tabellone."""
+    global _round_cache
+    _round_cache = cache
+
+def fetch_scoreboard_data(
+    tick_number: int,
+    report_errors: bool = True,
+    teams: Collection[str] | None = None,
+    background: bool = False
+) -> dict | None:
     """
     Effettua una richiesta GET all'API del tabellone per un dato tick.
+    I tick già conclusi vengono letti dalla cache su disco, se impostata.
+    Con `teams` vengono decodificati solo i team indicati (vedi json_stream).
+    Con `background` la richiesta non influisce sull'interruttore delle richieste live.
     """
-    return _fetch_json(f"{SCOREBOARD_ENDPOINT}{tick_number}")
+    if _round_cache is not None:
+        cached = _round_cache.get(tick_number, teams)
+        if cached is not None:
+            metrics.count('round_cache_hits_total')
+            return cached
+    cacheable = _round_cache is not None and _last_scoreboard_round is not None and tick_number <= _last_scoreboard_round
+    raw_body = [] if cacheable else None
+    with metrics.span('scoreboard_fetch'):
+        data = _fetch_json(f"{SCOREBOARD_ENDPOINT}{tick_number}", report_errors, teams, raw_body, background=background)
+    if data and raw_body:
+        _round_cache.put_raw(tick_number, b''.join(raw_body))
+    return data
 
 def fetch_game_status() -> dict | None:
     """
     Effettua una richiesta GET all'API di stato del gioco.
     """
-    return _fetch_json(STATUS_ENDPOINT)
\ No newline at end of file
+    global _last_scoreboard_round
+    with metrics.span('status_poll'):
+        status_data = _fetch_json(STATUS_ENDPOINT, revalidate=True)
+    if status_data and status_data.get('scoreboardRound') is not None:
+        _last_scoreboard_round = status_data['scoreboardRound']
+    return status_data
+
+
+def _submit_scoreboards(round_number: int, include_previous: bool, report_errors: bool, teams: Collection[str] | None) -> dict:
+    """Avvia in parallelo il download del tick indicato e, se richiesto, di quello precedente."""
+    executor = _get_executor()
+    futures = {'current': executor.submit(fetch_scoreboard_data, round_number, report_errors, teams)}
+    if include_previous and round_number > 0:
+        futures['previous'] = executor.submit(fetch_scoreboard_data, round_number - 1, report_errors, teams)
+    return futures
+
+def fetch_tick_bundle(
+    expected_round: int | None = None,
+    include_previous: bool = True,
+    status_data: dict | None = None,
+    teams: Collection[str] | None = None
+) -> dict | None:
+    """
+    Recupera in parallelo stato della partita, tabellone del round corrente e (opzionalmente)
+    del round precedente, restituendo un unico pacchetto:
+    {'round', 'status', 'current', 'previous'}.
+
+    Se `expected_round` è noto, i tabelloni vengono richiesti insieme allo stato; se lo stato
+    riporta un round diverso, le richieste speculative vengono annullate e ripetute.
+    Se il round atteso non è ancora iniziato, i tabelloni restano a None.
+    Se `status_data` è già disponibile, la richiesta di stato viene saltata.
+    Con `teams` i tabelloni vengono decodificati solo per i team indicati.
+    """
+    executor = _get_executor()
+    status_future = executor.submit(fetch_game_status) if status_data is None else None
+    known_round = status_data.get('scoreboardRound') if status_data else expected_round
+    # Le richieste speculative possono fallire (tick non ancora pubblicato): niente errori a video
+    speculative = status_data is None
+    futures = _submit_scoreboards(known_round, include_previous, not speculative, teams) if known_round is not None else {}
+
+    if status_future is not None:
+        status_data = status_future.result()
+    if not status_data or status_data.get('scoreboardRound') is None:
+        for future in futures.values(): future.cancel()
+        return None
+
+    actual_round = status_data['scoreboardRound']
+    bundle = {'round': actual_round, 'status': status_data, 'current': None, 'previous': None}
+    if actual_round != known_round:
+        for future in futures.values(): future.cancel()
+        if expected_round is not None and actual_round < expected_round:
+            # Il round atteso non è ancora iniziato: nessun tabellone da scaricare
+            return bundle
+        futures = _submit_scoreboards(actual_round, include_previous, True, teams)
+
+    for key, future in futures.items():
+        bundle[key] = future.result()
+    if bundle['current'] is None and speculative:
+        # La richiesta speculativa può aver preceduto la pubblicazione del tick: si riprova una volta
+        bundle['current'] = fetch_scoreboard_data(actual_round, teams=teams)
+    return bundle
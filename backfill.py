@@ -0,0 +1,108 @@
+# scoreboard_monitor/backfill.py
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import api_client
+import data_processor
+import metrics
+from config import BACKFILL_CONCURRENCY, BACKFILL_MAX_REQUESTS_PER_SECOND
+
+class _RateLimiter:
+    """Distanzia l'avvio delle richieste di almeno 1 / `max_per_second` secondi."""
+
+    def __init__(self, max_per_second: float):
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _extract_victim_scores(round_data: dict | None, team_shortname: str) -> Dict[str, float] | None:
+    """Riduce il tabellone di un round ai soli punteggi persi per servizio, usati dallo storico del team."""
+    team = data_processor.find_team_in_scoreboard(round_data, team_shortname)
+    if not team:
+        return None
+    return {s['shortname']: s.get('victimScore', 0) for s in team.get('services', [])}
+
+class HistoryBackfill:
+    """
+    Ricostruisce in background lo storico completo delle perdite per servizio,
+    scaricando i round 1..`last_round` con concorrenza limitata e frequenza massima di richieste.
+
+    Usa un proprio pool di thread, separato da quello di api_client, così da non ritardare mai
+    l'elaborazione del tick live. Al termine `done` viene impostato e lo storico
+    (`loss_history`, dal round più recente al più vecchio) è pronto.
+    """
+
+    def __init__(
+        self,
+        team_shortname: str,
+        last_round: int,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        max_requests_per_second: float = BACKFILL_MAX_REQUESTS_PER_SECOND
+    ):
+        self.team_shortname = team_shortname
+        self.last_round = last_round
+        self.concurrency = concurrency
+        self.loss_history: Dict[str, List[float]] = {}
+        self.done = threading.Event()
+        self._rate_limiter = _RateLimiter(max_requests_per_second)
+        self._thread = None
+        self._on_done = None
+
+    def start(self, on_done: Callable[[], None] | None = None) -> "HistoryBackfill":
+        """Avvia il backfill in un thread demone; `on_done` viene invocato (da quel thread) al termine."""
+        self._on_done = on_done
+        self._thread = threading.Thread(target=self._run, name='backfill', daemon=True)
+        self._thread.start()
+        return self
+
+    def _load_round(self, round_number: int) -> Dict[str, float] | None:
+        """Punteggi persi del team nel round indicato, o None (un buco nello storico) in caso di errore."""
+        self._rate_limiter.wait()
+        with metrics.background():
+            try:
+                round_data = api_client.fetch_scoreboard_data(
+                    round_number, report_errors=False, teams=(self.team_shortname,), background=True
+                )
+                return _extract_victim_scores(round_data, self.team_shortname)
+            except Exception:
+                # Un round non valido non deve far perdere il resto dello storico
+                metrics.count('backfill_errors_total')
+                return None
+
+    def _run(self):
+        try:
+            rounds = range(self.last_round, 0, -1)
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='backfill') as executor:
+                counters = dict(zip(rounds, executor.map(self._load_round, rounds)))
+            self._build_history(counters)
+        finally:
+            self.done.set()
+            if self._on_done is not None:
+                self._on_done()
+
+    def _build_history(self, counters: Dict[int, Dict[str, float] | None]):
+        # Il round 0 non ha tabellone: i contatori partono da zero, come in process_data_for_display
+        previous = {}
+        for round_number in range(1, self.last_round + 1):
+            current = counters.get(round_number)
+            if current is None:
+                previous = None
+                continue
+            for s_name, victim_score in current.items():
+                if previous is not None:
+                    prev_victim_score = previous.get(s_name, 0)
+                    self.loss_history.setdefault(s_name, []).append(abs(victim_score - prev_victim_score))
+            previous = current
+        for history in self.loss_history.values():
+            history.reverse()
@@ -0,0 +1,214 @@
+# scoreboard_monitor/benchmark.py
+
+import json
+import itertools
+import time
+import platform
+import argparse
+import statistics
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List
+
+import data_processor
+import json_stream
+import terminal_ui
+from advice_engine import ShutdownAdvisor
+from history_store import GameHistory
+from synthetic import SyntheticGame
+from config import TARGET_TEAM_SHORTNAME, LOSS_HISTORY_ROUNDS, BENCHMARK_RESULTS_FILE, COLOR_BOLD, COLOR_RED, COLOR_GREEN, COLOR_RESET
+
+# Variazione oltre la quale un risultato viene segnalato come regressione o miglioramento
+REGRESSION_THRESHOLD = 0.10
+
+class _NullStream:
+    """Destinazione di scrittura che scarta tutto, per misurare il rendering senza terminale."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+def _measure(func: Callable[[], Any], repeat: int, number: int) -> Dict[str, float]:
+    """Esegue `func` `number` volte per `repeat` ripetizioni; restituisce i tempi per chiamata in secondi."""
+    func()  # riscaldamento (import, cache di rendering, allocazioni)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'calls': repeat * number,
+    }
+
+def _alternating(values: list) -> Callable[[], Any]:
+    """Restituisce una funzione che fornisce a rotazione i valori indicati, per eludere le cache per identità."""
+    state = {'i': 0}
+    def next_value():
+        state['i'] = (state['i'] + 1) % len(values)
+        return values[state['i']]
+    return next_value
+
+def build_cases(game: SyntheticGame, team_shortname: str) -> Dict[str, Callable[[], Any]]:
+    """
+    Prepara i casi misurati sui tabelloni degli ultimi round della partita sintetica.
+    I casi "cold" alternano snapshot diversi, così che le memoizzazioni per identità non scattino.
+    """
+    last_round = game.rounds
+    rounds = list(range(max(1, last_round - LOSS_HISTORY_ROUNDS - 1), last_round + 1))
+    boards = {r: game.scoreboard(r) for r in rounds}
+    bodies = {r: json.dumps(boards[r]) for r in rounds}
+    status = game.status(last_round)
+    pairs = [(boards[r], boards[r - 1]) for r in rounds[1:]]
+    processed = [data_processor.process_data_for_display(current, previous, team_shortname) for current, previous in pairs]
+    loss_history = {
+        s_name: [abs(team['services'][s_name]['defense_score_delta']) for team in reversed(processed)]
+        for s_name in processed[-1]['services']
+    }
+    advice = data_processor.calculate_shutdown_advice(processed[-1], status, loss_history)
+
+    next_body, next_board, next_pair = _alternating(list(bodies.values())), _alternating(list(boards.values())), _alternating(pairs)
+    next_processed = _alternating(processed)
+    body = bodies[last_round]
+
+    # Percorso usato da main: storico compatto, viste sullo storico e motore incrementale dei consigli
+    history = GameHistory()
+    for r in rounds:
+        history.add_round(r, boards[r])
+    next_round = _alternating(rounds)
+    next_round_board = _alternating([(r, boards[r]) for r in rounds])
+    next_round_body = _alternating([(r, bodies[r]) for r in rounds])
+    team_view = data_processor.process_history_for_display(history, last_round, team_shortname)
+    advisor = ShutdownAdvisor.from_history(loss_history)
+    # Il motore ignora i round già registrati: ogni chiamata ne simula uno nuovo
+    advisor_rounds = itertools.count(last_round + 1)
+    pipeline_advisor = ShutdownAdvisor.from_history(loss_history)
+    pipeline_rounds = itertools.count(last_round + 1)
+
+    return {
+        'json_decode': lambda: json.loads(body),
+        'json_decode_selective': lambda: json_stream.parse_scoreboard(body, (team_shortname,)),
+        'find_team_in_scoreboard': lambda: data_processor.find_team_in_scoreboard(boards[last_round], team_shortname),
+        'find_team_in_scoreboard_cold': lambda: data_processor.find_team_in_scoreboard(next_board(), team_shortname),
+        'process_data_for_display': lambda: data_processor.process_data_for_display(*pairs[-1], team_shortname),
+        'process_data_for_display_cold': lambda: data_processor.process_data_for_display(*next_pair(), team_shortname),
+        'calculate_shutdown_advice': lambda: data_processor.calculate_shutdown_advice(processed[-1], status, loss_history),
+        'display_scoreboard': lambda: terminal_ui.display_scoreboard(processed[-1], status, advice),
+        'display_scoreboard_changing': lambda: terminal_ui.display_scoreboard(next_processed(), status, advice),
+        'history_add_round': lambda: history.add_round(*next_round_board()),
+        'process_history_for_display': lambda: data_processor.process_history_for_display(history, last_round, team_shortname),
+        'process_history_for_display_cold': lambda: data_processor.process_history_for_display(history, next_round(), team_shortname),
+        'shutdown_advisor_round': lambda: _advisor_round(advisor, next(advisor_rounds), team_view, status),
+        'tick_pipeline': lambda: _tick(*next_round_body(), history, pipeline_advisor, pipeline_rounds, status, team_shortname),
+        'tick_pipeline_dict': lambda: _tick_dict(next_body(), boards, status, loss_history, team_shortname),
+    }
+
+def _advisor_round(advisor: ShutdownAdvisor, round_number: int, team_data, status: dict):
+    advisor.update(round_number, team_data)
+    return advisor.advise(team_data, status)
+
+def _tick(round_number: int, body: str, history: GameHistory, advisor: ShutdownAdvisor, advisor_rounds, status: dict, team_shortname: str):
+    """Percorso di un tick come in main: decodifica, storico, vista del team, consigli e rendering."""
+    history.add_round(round_number, json.loads(body))
+    team_data = data_processor.process_history_for_display(history, round_number, team_shortname)
+    advice = _advisor_round(advisor, next(advisor_rounds), team_data, status)
+    terminal_ui.display_scoreboard(team_data, status, advice)
+
+def _tick_dict(body: str, boards: dict, status: dict, loss_history: dict, team_shortname: str):
+    """Percorso di un tick sui dizionari del tabellone (precedente allo storico compatto), per confronto."""
+    current = json.loads(body)
+    previous = boards.get(status['scoreboardRound'] - 1)
+    team_data = data_processor.process_data_for_display(current, previous, team_shortname)
+    advice = data_processor.calculate_shutdown_advice(team_data, status, loss_history)
+    terminal_ui.display_scoreboard(team_data, status, advice)
+
+def run(game: SyntheticGame, repeat: int = 5, number: int = 20, only: List[str] | None = None, team_shortname: str = TARGET_TEAM_SHORTNAME) -> Dict[str, Dict[str, float]]:
+    """Esegue i casi del benchmark con il rendering rediretto su una destinazione nulla."""
+    original_renderer = terminal_ui._renderer
+    terminal_ui._renderer = terminal_ui.FrameRenderer(_NullStream())
+    try:
+        cases = build_cases(game, team_shortname)
+        return {name: _measure(func, repeat, number) for name, func in cases.items() if not only or name in only}
+    finally:
+        terminal_ui._renderer = original_renderer
+
+def load_previous(path: str, params: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Ultimo risultato salvato in `path` ottenuto con gli stessi parametri."""
+    previous = None
+    try:
+        with open(path, 'r', encoding='utf-8') as results_file:
+            for line in results_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('params') == params:
+                    previous = entry
+    except FileNotFoundError:
+        pass
+    return previous
+
+def save(path: str, params: Dict[str, Any], results: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    entry = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'a', encoding='utf-8') as results_file:
+        results_file.write(json.dumps(entry) + '\n')
+    return entry
+
+def format_report(results: Dict[str, Dict[str, float]], previous: Dict[str, Any] | None = None) -> str:
+    """Tabella dei tempi mediani, con la variazione rispetto all'esecuzione precedente se disponibile."""
+    previous_results = previous['results'] if previous else {}
+    lines = [f"{COLOR_BOLD}{'Caso':<32}{'mediana':>12}{'minimo':>12}{'variazione':>14}{COLOR_RESET}"]
+    for name, result in results.items():
+        change = ""
+        old = previous_results.get(name)
+        if old and old.get('median'):
+            ratio = result['median'] / old['median'] - 1
+            color = COLOR_RED if ratio > REGRESSION_THRESHOLD else COLOR_GREEN if ratio < -REGRESSION_THRESHOLD else ""
+            change = f"{color}{ratio:>+13.1%}{COLOR_RESET if color else ''}"
+        lines.append(f"{name:<32}{_format_time(result['median']):>12}{_format_time(result['min']):>12} {change}")
+    return '\n'.join(lines)
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1: return f"{seconds:.2f} s"
+    if seconds >= 1e-3: return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei percorsi critici del monitor su tabelloni sintetici.")
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--services', type=int, default=6)
+    parser.add_argument('--rounds', type=int, default=60)
+    parser.add_argument('--checks', type=int, default=3)
+    parser.add_argument('--stdout-bytes', type=int, default=200)
+    parser.add_argument('--failure-rate', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help="Casi da eseguire (default: tutti)")
+    parser.add_argument('--output', default=BENCHMARK_RESULTS_FILE, help="File JSONL in cui accodare i risultati")
+    parser.add_argument('--no-save', action='store_true', help="Non salva i risultati")
+    args = parser.parse_args()
+
+    params = {
+        'teams': args.teams, 'services': args.services, 'rounds': args.rounds, 'checks': args.checks,
+        'stdout_bytes': args.stdout_bytes, 'failure_rate': args.failure_rate, 'seed': args.seed,
+    }
+    game = SyntheticGame(**params)
+    results = run(game, args.repeat, args.number, args.only)
+    print(format_report(results, load_previous(args.output, params)))
+    if not args.no_save:
+        save(args.output, params, results)
+        print(f"\nRisultati salvati in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# scoreboard_monitor/columnar.py
+
+from typing import Dict, List
+
+import numpy as np
+
+# Campi numerici di ogni servizio, nell'ordine del primo asse delle tabelle colonnari
+FIELDS = ('score', 'attackerScore', 'victimScore', 'stolen', 'lost', 'successfulChecks', 'totalChecks')
+FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+def build_table(data: dict | None, team_names: List[str], service_names: List[str]) -> np.ndarray:
+    """
+    Converte un tabellone in un array (campi × team × servizi) allineato agli ordinamenti dati.
+    Team o servizi assenti nel tabellone restano a zero, come i valori precedenti mancanti nel
+    calcolo per dizionari.
+    """
+    table = np.zeros((len(FIELDS), len(team_names), len(service_names)))
+    if not data or 'scoreboard' not in data:
+        return table
+    team_index = {name: i for i, name in enumerate(team_names)}
+    service_index = {name: i for i, name in enumerate(service_names)}
+    rows, cols, values = [], [], []
+    for team in data['scoreboard']:
+        t = team_index.get(team.get('shortname'))
+        if t is None:
+            continue
+        for service in team.get('services', []):
+            s = service_index.get(service.get('shortname'))
+            if s is None:
+                continue
+            rows.append(t)
+            cols.append(s)
+            values.append([service.get(field, 0) for field in FIELDS])
+    if values:
+        table[:, rows, cols] = np.asarray(values, dtype=float).T
+    return table
+
+def _sla(table: np.ndarray) -> np.ndarray:
+    """SLA percentuale di ogni cella; 0 dove non è stato eseguito alcun check."""
+    successful = table[FIELD_INDEX['successfulChecks']]
+    total = table[FIELD_INDEX['totalChecks']]
+    sla = np.zeros_like(total)
+    np.divide(successful, total, out=sla, where=total > 0)
+    return sla * 100
+
+def compute_metrics(current: np.ndarray, previous: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcola su tutta la tabella (team × servizi) i valori e le variazioni rispetto al tick
+    precedente, con gli stessi risultati di data_processor._process_team.
+    """
+    score, attacker, victim, stolen, lost = (current[FIELD_INDEX[f]] for f in FIELDS[:5])
+    prev_score, prev_attacker, prev_victim, prev_stolen, prev_lost = (previous[FIELD_INDEX[f]] for f in FIELDS[:5])
+    sla, prev_sla = _sla(current), _sla(previous)
+    sla_adjusted_score = score * (sla / 100.0)
+    prev_sla_adjusted_score = prev_score * (prev_sla / 100.0)
+    return {
+        'score': score, 'score_delta': score - prev_score,
+        'sla': sla, 'sla_delta': sla - prev_sla,
+        'sla_adjusted_score': sla_adjusted_score,
+        'sla_adjusted_score_delta': sla_adjusted_score - prev_sla_adjusted_score,
+        'attack_score_delta': attacker - prev_attacker,
+        'attack_flag_delta': stolen - prev_stolen,
+        'defense_score_delta': victim - prev_victim,
+        'defense_flag_delta': -(lost - prev_lost),
+    }
+
+def compute_window_metrics(history: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    """
+    Variazioni su finestre di `window` round per una pila di tabelle (round × campi × team × servizi):
+    l'elemento i confronta il round i + window con il round i. Lo SLA di finestra è calcolato sui
+    soli check eseguiti nella finestra.
+    """
+    if window <= 0 or history.shape[0] <= window:
+        shape = (0,) + history.shape[2:]
+        return {name: np.zeros(shape) for name in ('score_delta', 'attack_score_delta', 'defense_score_delta', 'sla')}
+    delta = history[window:] - history[:-window]
+    successful = delta[:, FIELD_INDEX['successfulChecks']]
+    total = delta[:, FIELD_INDEX['totalChecks']]
+    window_sla = np.zeros_like(total)
+    np.divide(successful, total, out=window_sla, where=total > 0)
+    return {
+        'score_delta': delta[:, FIELD_INDEX['score']],
+        'attack_score_delta': delta[:, FIELD_INDEX['attackerScore']],
+        'defense_score_delta': delta[:, FIELD_INDEX['victimScore']],
+        'sla': window_sla * 100,
+    }
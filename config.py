@@ -1,12 +1,60 @@
 # scoreboard_monitor/config.py
 
+import os
+
 # --- Impostazioni API ---
-BASE_URL = "http://10.10.0.1/api/"
+# Sovrascrivibile con la variabile d'ambiente SCOREBOARD_MONITOR_BASE_URL (es. per usare mock_server.py)
+BASE_URL = os.environ.get("SCOREBOARD_MONITOR_BASE_URL", "http://10.10.0.1/api/")
 STATUS_ENDPOINT = "status"
 SCOREBOARD_ENDPOINT = "scoreboard/table/"
+# Timeout (in secondi) per stabilire la connessione e per ricevere i dati di una richiesta HTTP
+HTTP_CONNECT_TIMEOUT_SECONDS = 3
+HTTP_READ_TIMEOUT_SECONDS = 5
+# Tempo massimo complessivo (in secondi) di una richiesta, tentativi e attese del backoff compresi
+HTTP_REQUEST_DEADLINE_SECONDS = 6.0
+# Tentativi per richiesta in caso di errori di rete, timeout o risposte 5xx
+RETRY_MAX_ATTEMPTS = 3
+# Attesa di base e massima (in secondi) del backoff esponenziale tra i tentativi
+RETRY_BASE_DELAY_SECONDS = 0.2
+RETRY_MAX_DELAY_SECONDS = 10.0
+# Errori consecutivi dopo cui l'API viene considerata irraggiungibile e le richieste sospese
+CIRCUIT_FAILURE_THRESHOLD = 5
+# Durata (in secondi) della sospensione prima di una richiesta di prova
+CIRCUIT_OPEN_SECONDS = 15.0
+# Numero massimo di connessioni keep-alive mantenute nel pool della sessione HTTP
+HTTP_POOL_SIZE = 4
 # Durata del tick di default, verrà sovrascritta da quella dell'API se disponibile
 DEFAULT_TICK_DURATION_SECONDS = 120
 
+# --- Impostazioni Cache dei Round ---
+# Cartella in cui salvare i tabelloni dei round conclusi (None per disattivare la cache)
+ROUND_CACHE_DIR = ".round_cache"
+# Dimensione massima (in byte) del file dati della cache, oltre la quale si scartano i round più vecchi
+ROUND_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Numero di round di storico delle perdite usati per i consigli strategici
+LOSS_HISTORY_ROUNDS = 5
+
+# --- Impostazioni Backfill dello Storico ---
+# Se True, all'avvio a partita in corso vengono scaricati in background tutti i round precedenti
+BACKFILL_ENABLED = True
+# Numero massimo di richieste di backfill contemporanee
+BACKFILL_CONCURRENCY = 4
+# Frequenza massima delle richieste di backfill verso l'API
+BACKFILL_MAX_REQUESTS_PER_SECOND = 10.0
+
+# --- Impostazioni Scheduler dei Tick ---
+# Ampiezza (in secondi) della finestra attorno al cambio round previsto in cui si interroga fittamente
+TICK_POLL_WINDOW_SECONDS = 3.0
+# Intervallo tra i poll di /status all'interno della finestra
+TICK_DENSE_POLL_INTERVAL_SECONDS = 0.5
+# Intervallo massimo tra i poll quando il cambio round non è prevedibile o è in ritardo
+TICK_MAX_POLL_INTERVAL_SECONDS = 5.0
+
+# Se True, i tabelloni vengono letti in streaming decodificando solo il team monitorato
+SCOREBOARD_SELECTIVE_PARSE = False
+# Dimensione (in byte) dei blocchi letti dalla risposta in modalità streaming
+SCOREBOARD_STREAM_CHUNK_BYTES = 64 * 1024
+
 # --- Impostazioni Team ---
 # Modifica questo valore con il team che vuoi monitorare
 TARGET_TEAM_SHORTNAME = "unirm2"
@@ -21,6 +69,59 @@ COLOR_MAGENTA = "\033[95m"
 COLOR_BOLD = "\033[1m"
 COLOR_RESET = "\033[0m"
 
+# --- Impostazioni Rendering ---
+# Numero massimo di elementi (larghezze, celle formattate, colonne dei servizi) nelle cache di rendering
+RENDER_CACHE_SIZE = 4096
+
+# --- Impostazioni Analisi del Tabellone ---
+# Numero di team mostrati per servizio nelle classifiche di attaccanti e vittime
+ANALYTICS_TOP_K = 3
+# Ampiezza (in round) della finestra dei team che hanno guadagnato più punti d'attacco di recente
+ANALYTICS_WINDOW_ROUNDS = 10
+# Se True, il pannello di analisi è visibile all'avvio (tasto v per mostrarlo/nasconderlo).
+# Richiede i tabelloni completi, cioè SCOREBOARD_SELECTIVE_PARSE = False
+ANALYTICS_PANEL_ENABLED = False
+
+# --- Impostazioni Daemon di Distribuzione ---
+# Indirizzo e porta su cui `python fanout.py serve` pubblica i dati elaborati ai client.
+# Il daemon non ha autenticazione e sulla rete della CTF è raggiungibile dagli avversari: per
+# servire i compagni di squadra si indica esplicitamente un indirizzo con `--bind`
+FANOUT_BIND_ADDRESS = "127.0.0.1"
+FANOUT_PORT = 8700
+# Se impostato (es. "http://10.0.0.5:8700"), main.py visualizza i dati del daemon invece di interrogare l'API
+FANOUT_SERVER_URL = None
+# Intervallo (in secondi) dei keepalive inviati ai client in assenza di aggiornamenti
+FANOUT_KEEPALIVE_SECONDS = 15.0
+# Attesa (in secondi) prima di ricollegarsi al daemon dopo un errore
+FANOUT_RECONNECT_SECONDS = 2.0
+
+# --- Impostazioni Metriche ---
+# Se True, le fasi di ogni tick (poll, download, decodifica, elaborazione, consigli, rendering) vengono cronometrate
+METRICS_ENABLED = False
+# File JSONL in cui accodare un record per tick (None per disattivare)
+METRICS_JSONL_FILE = "metrics.jsonl"
+# Porta locale dell'endpoint /metrics in formato Prometheus (None per disattivare)
+METRICS_HTTP_PORT = None
+# Numero di misure recenti per fase usate nel riepilogo
+METRICS_SUMMARY_WINDOW = 200
+
+# --- Impostazioni Avvisi ---
+# Lunghezza massima (in caratteri) dei messaggi dei checker mostrati; oltre viene troncato e marcato con un hash
+ALERT_MESSAGE_MAX_CHARS = 160
+# Numero di output distinti dei checker di cui viene conservato il messaggio già elaborato
+ALERT_MESSAGE_CACHE_SIZE = 1024
+# Ogni quanti round ripetere l'avviso per un servizio che resta in errore (0 per non ripeterlo)
+ALERT_REMINDER_ROUNDS = 10
+# Intervallo minimo (in secondi) tra due notifiche; gli avvisi arrivati nel frattempo vengono accorpati
+ALERT_MIN_INTERVAL_SECONDS = 30.0
+# Comando eseguito per ogni notifica, con il testo degli avvisi come ultimo argomento
+# (es. ["notify-send", "Scoreboard monitor"]; None per usare solo il segnale acustico)
+ALERT_COMMAND = None
+
+# --- Impostazioni Benchmark ---
+# File JSONL in cui benchmark.py accoda i risultati di ogni esecuzione, per confrontarli nel tempo
+BENCHMARK_RESULTS_FILE = "benchmark_results.jsonl"
+
 # --- Soglie per colorazione ---
 SLA_DEGRADED_THRESHOLD = 90.0
 SLA_CRITICAL_THRESHOLD = 75.0
\ No newline at end of file
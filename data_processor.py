@@ -2,25 +2,52 @@
 
 from typing import Dict, Any, List
 
-def find_team_in_scoreboard(data: dict, team_shortname: str) -> dict | None:
-    """Trova i dati di un team specifico all'interno del JSON del tabellone."""
+import columnar
+from alerts import checker_message
+from advice_engine import ShutdownAdvisor
+
+# Mappa delle azioni dei checker sulle lettere visualizzate, nell'ordine [S P G]
+CHECK_ACTION_MAP = {'CHECK_SLA': 'S', 'PUT_FLAG': 'P', 'GET_FLAG': 'G'}
+CHECK_ORDER = ['S', 'P', 'G']
+
+# Ultimo indice costruito (tabellone, indice) e ultima elaborazione completa (corrente, precedente, risultato).
+# Il confronto è per identità: lo stesso snapshot non viene mai indicizzato o elaborato due volte.
+_last_index = (None, {})
+_last_processed = (None, None, {})
+
+def index_scoreboard(data: dict | None) -> Dict[str, dict]:
+    """Costruisce (una sola volta per snapshot) l'indice shortname -> team del tabellone."""
+    global _last_index
     if not data or 'scoreboard' not in data:
-        return None
-    for team in data['scoreboard']:
-        if team.get('shortname') == team_shortname:
-            return team
-    return None
+        return {}
+    indexed_data, index = _last_index
+    if indexed_data is data:
+        return index
+    index = {team.get('shortname'): team for team in data['scoreboard']}
+    _last_index = (data, index)
+    return index
+
+def index_services(data: dict | None) -> Dict[str, int]:
+    """Restituisce la posizione di ogni servizio secondo l'ordine della lista `services` del tabellone."""
+    if not data or not data.get('services'):
+        return {}
+    return {s_info['shortname']: i for i, s_info in enumerate(data['services'])}
 
-def process_data_for_display(current_data: dict, previous_data: dict | None, team_shortname: str) -> dict | None:
+def find_team_in_scoreboard(data: dict, team_shortname: str) -> dict | None:
+    """Trova i dati di un team specifico all'interno del JSON del tabellone."""
+    return index_scoreboard(data).get(team_shortname)
+
+def _process_team(
+    current_team: dict,
+    previous_team: dict | None,
+    service_order: Dict[str, int],
+    metrics: Dict[str, list],
+    service_columns: Dict[str, int]
+) -> dict:
     """
-    Estrae e calcola i dati necessari per la visualizzazione, garantendo l'ordine dei check [S P G].
+    Assembla i dati visualizzati per un singolo team. I valori numerici derivati arrivano già
+    calcolati da `metrics` (riga del team nelle tabelle di columnar.compute_metrics).
     """
-    current_team = find_team_in_scoreboard(current_data, team_shortname)
-    previous_team = find_team_in_scoreboard(previous_data, team_shortname) if previous_data else None
-
-    if not current_team:
-        return None
-    
     current_total_score = current_team.get('score', 0)
     previous_total_score = previous_team.get('score', 0) if previous_team else current_total_score
     score_delta = current_total_score - previous_total_score
@@ -35,72 +62,103 @@ def process_data_for_display(current_data: dict, previous_data: dict | None, tea
         'failing_services': {}
     }
 
-    prev_services = {s['shortname']: s for s in previous_team['services']} if previous_team else {}
-
     for service in current_team['services']:
         s_name = service['shortname']
-        prev_s = prev_services.get(s_name)
-
-        score = service.get('score', 0)
-        attacker_score = service.get('attackerScore', 0)
-        attack_flag = service.get('stolen', 0)
-        victim_score = service.get('victimScore', 0)
-        defense_flag = service.get('lost', 0)
-        sla = (service['successfulChecks'] / service['totalChecks']) * 100 if service['totalChecks'] > 0 else 0.0
-        sla_adjusted_score = score * (sla / 100.0)
-
-        prev_score = prev_s.get('score', 0) if prev_s else 0
-        prev_sla = 0.0
-        if prev_s and prev_s.get('totalChecks', 0) > 0:
-            prev_sla = (prev_s['successfulChecks'] / prev_s['totalChecks']) * 100
-        prev_sla_adjusted_score = prev_score * (prev_sla / 100.0)
-
-        score_delta = score - prev_score
-        attacker_score_delta = attacker_score - (prev_s.get('attackerScore', 0) if prev_s else 0)
-        victim_score_delta = victim_score - (prev_s.get('victimScore', 0) if prev_s else 0)
-        sla_delta = sla - prev_sla
-        sla_adjusted_score_delta = sla_adjusted_score - prev_sla_adjusted_score
-        attack_flag_delta = service['stolen'] - prev_s.get('stolen', 0) if prev_s else service['stolen']
-        defense_flag_delta = -(service['lost'] - prev_s.get('lost', 0) if prev_s else service['lost'])
+        col = service_columns[s_name]
 
         check_results = {}
-        action_map = {'CHECK_SLA': 'S', 'PUT_FLAG': 'P', 'GET_FLAG': 'G'}
         for check in service.get('checks', []):
             action = check.get('action')
-            if action in action_map:
+            if action in CHECK_ACTION_MAP:
                 is_ok = check.get('exitCode') == 101
-                check_results[action_map[action]] = is_ok
+                check_results[CHECK_ACTION_MAP[action]] = is_ok
                 if not is_ok and s_name not in processed['failing_services']:
-                    error_message = check.get('stdout', 'Errore sconosciuto').strip().replace('\n', ' ')
+                    error_message = checker_message(check.get('stdout'))
                     processed['failing_services'][s_name] = error_message
         
         ordered_checks_details = []
-        for char in ['S', 'P', 'G']:
+        for char in CHECK_ORDER:
             ordered_checks_details.append({'action': char, 'ok': check_results.get(char, False)})
 
         processed['services'][s_name] = {
-            'score': score, 'score_delta': score_delta,
-            'sla': sla, 'sla_delta': sla_delta,
-            'sla_adjusted_score': sla_adjusted_score, 'sla_adjusted_score_delta': sla_adjusted_score_delta,
-            'attack_score': attacker_score, 'attack_flag': attack_flag,
-            'attack_score_delta': attacker_score_delta, 'attack_flag_delta': attack_flag_delta,
-            'defense_score': victim_score, 'defense_flag': defense_flag,
-            'defense_score_delta': victim_score_delta, 'defense_flag_delta': defense_flag_delta,
+            'score': service.get('score', 0), 'score_delta': metrics['score_delta'][col],
+            'sla': metrics['sla'][col], 'sla_delta': metrics['sla_delta'][col],
+            'sla_adjusted_score': metrics['sla_adjusted_score'][col],
+            'sla_adjusted_score_delta': metrics['sla_adjusted_score_delta'][col],
+            'attack_score': service.get('attackerScore', 0), 'attack_flag': service.get('stolen', 0),
+            'attack_score_delta': metrics['attack_score_delta'][col], 'attack_flag_delta': int(metrics['attack_flag_delta'][col]),
+            'defense_score': service.get('victimScore', 0), 'defense_flag': service.get('lost', 0),
+            'defense_score_delta': metrics['defense_score_delta'][col], 'defense_flag_delta': int(metrics['defense_flag_delta'][col]),
             'checks': ordered_checks_details,
             'successfulChecks': service.get('successfulChecks', 0),
             'totalChecks': service.get('totalChecks', 0)
         }
         
-    ordered_services = {}
-    if current_data.get('services'):
-        for s_info in current_data['services']:
-            s_name = s_info['shortname']
-            if s_name in processed['services']:
-                ordered_services[s_name] = processed['services'][s_name]
-        processed['services'] = ordered_services
+    if service_order:
+        ordered_names = sorted((s for s in processed['services'] if s in service_order), key=service_order.__getitem__)
+        processed['services'] = {s_name: processed['services'][s_name] for s_name in ordered_names}
 
     return processed
 
+def process_all_teams(current_data: dict, previous_data: dict | None) -> Dict[str, dict]:
+    """
+    Elabora in un solo passaggio tutti i team del tabellone, restituendo shortname -> dati visualizzati.
+    Variazioni, SLA e punteggi pesati sono calcolati in forma vettoriale su tutta la tabella
+    team × servizi. Il risultato dell'ultimo snapshot viene riutilizzato, così cambiare o
+    aggiungere team osservati non richiede una nuova elaborazione.
+    """
+    global _last_processed
+    cached_current, cached_previous, cached_result = _last_processed
+    if cached_current is current_data and cached_previous is previous_data:
+        return cached_result
+    if not current_data or 'scoreboard' not in current_data:
+        return {}
+
+    previous_index = {team.get('shortname'): team for team in previous_data.get('scoreboard', [])} if previous_data else {}
+    service_order = index_services(current_data)
+    team_names = [team.get('shortname') for team in current_data['scoreboard']]
+    service_names = list(dict.fromkeys(
+        service['shortname'] for team in current_data['scoreboard'] for service in team['services']
+    ))
+    service_columns = {name: i for i, name in enumerate(service_names)}
+    metrics = columnar.compute_metrics(
+        columnar.build_table(current_data, team_names, service_names),
+        columnar.build_table(previous_data, team_names, service_names)
+    )
+    metrics = {name: values.tolist() for name, values in metrics.items()}
+
+    result = {}
+    for row, team in enumerate(current_data['scoreboard']):
+        team_metrics = {name: values[row] for name, values in metrics.items()}
+        result[team_names[row]] = _process_team(
+            team, previous_index.get(team_names[row]), service_order, team_metrics, service_columns
+        )
+    _last_processed = (current_data, previous_data, result)
+    return result
+
+def process_data_for_display(current_data: dict, previous_data: dict | None, team_shortname: str) -> dict | None:
+    """
+    Estrae e calcola i dati necessari per la visualizzazione, garantendo l'ordine dei check [S P G].
+    È una vista sul risultato di process_all_teams per un singolo team.
+    """
+    return process_all_teams(current_data, previous_data).get(team_shortname)
+
+def process_history_for_display(history, round_number: int, team_shortname: str):
+    """
+    Come process_data_for_display, ma sullo storico compatto (history_store.GameHistory):
+    restituisce una vista sugli array dello storico, senza copiarne i dati.
+    """
+    return history.team_view(round_number, team_shortname)
+
+def process_history_all_teams(history, round_number: int) -> Dict[str, Any]:
+    """Viste di tutti i team presenti nello storico per il round indicato."""
+    views = {}
+    for shortname in history.team_names:
+        view = history.team_view(round_number, shortname)
+        if view is not None:
+            views[shortname] = view
+    return views
+
 def calculate_shutdown_advice(
     team_data: Dict[str, Any], 
     status_data: Dict[str, Any], 
@@ -109,46 +167,6 @@ def calculate_shutdown_advice(
     """
     Analizza ogni servizio, usando una media mobile delle perdite, per determinare 
     se un arresto strategico potrebbe massimizzare il punteggio finale.
+    Versione senza stato di advice_engine.ShutdownAdvisor, costruita dallo storico indicato.
     """
-    advice = {}
-    if not team_data or not status_data or not team_data.get('services'):
-        return advice
-
-    current_round = status_data.get('scoreboardRound')
-    total_rounds = status_data.get('rounds')
-
-    if current_round is None or total_rounds is None or current_round >= total_rounds:
-        return advice
-
-    remaining_rounds = total_rounds - current_round
-
-    for s_name, s_data in team_data['services'].items():
-        history = loss_history.get(s_name, [])
-        
-        if not history:
-            continue
-
-        avg_loss = sum(history) / len(history)
-        
-        if avg_loss < 0.01:
-            continue
-            
-        points_lost_per_round_estimate = avg_loss
-        estimated_future_loss_if_up = remaining_rounds * points_lost_per_round_estimate
-        current_service_score = s_data['score']
-        
-        final_score_if_up = (current_service_score - estimated_future_loss_if_up) * (s_data['sla'] / 100.0)
-
-        current_up_ticks = s_data.get('successfulChecks', 0)
-        final_sla_if_down = (current_up_ticks / total_rounds) * 100
-        final_score_if_down = current_service_score * (final_sla_if_down / 100.0)
-        
-        if final_score_if_down > final_score_if_up:
-            advice_msg = f"(media su {len(history)} round)"
-            advice[s_name] = (
-                f"Valutare shutdown {advice_msg}. "
-                f"Stima punteggio finale con shutdown: {final_score_if_down:,.0f}. "
-                f"Stima se online: {final_score_if_up:,.0f}."
-            )
-            
-    return advice
\ No newline at end of file
+    return ShutdownAdvisor.from_history(loss_history).advise(team_data, status_data)
@@ -0,0 +1,169 @@
+# scoreboard_monitor/event_loop.py
+
+import os
+import sys
+import heapq
+import signal
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Any
+
+try:
+    import termios
+    import tty
+except ImportError:  # Windows: niente modalità cbreak, i tasti non sono disponibili
+    termios = tty = None
+
+class EventLoop:
+    """
+    Ciclo di eventi basato su selectors: il processo dorme finché non arriva qualcosa da fare.
+    Il risveglio usa una coppia di socket, perché su Windows select() accetta solo socket.
+
+    Sono eventi: i segnali (tramite signal.set_wakeup_fd sul self-pipe, es. SIGWINCH), i tasti
+    premuti sul terminale, i timer registrati con call_later() e il completamento di lavori in
+    altri thread (call_soon_threadsafe(), run_in_thread()). Dopo ogni risveglio vengono eseguiti
+    gli hook registrati con on_wake(), es. per ridisegnare la schermata dopo un resize.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = socket.socketpair()
+        self._wakeup_read.setblocking(False)
+        self._wakeup_write.setblocking(False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+        self._ready = deque()
+        self._timers = []
+        self._timer_seq = 0
+        self._wake_hooks = []
+        self._executor = None
+        self._previous_wakeup_fd = None
+        self._saved_tty = None
+        self._stdin_fd = None
+        if threading.current_thread() is threading.main_thread():
+            # I gestori dei segnali Python restano attivi; il byte scritto sul pipe risveglia select()
+            self._previous_wakeup_fd = signal.set_wakeup_fd(self._wakeup_write.fileno(), warn_on_full_buffer=False)
+
+    # --- Registrazione degli eventi ---
+
+    def call_soon_threadsafe(self, callback: Callable, *args):
+        """Accoda `callback` dal thread chiamante e risveglia il ciclo."""
+        self._ready.append((callback, args))
+        self._wake()
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        self._timer_seq += 1
+        heapq.heappush(self._timers, (time.monotonic() + delay, self._timer_seq, callback, args))
+
+    def on_wake(self, hook: Callable[[], None]):
+        """Registra una funzione eseguita dopo ogni gruppo di eventi elaborati."""
+        self._wake_hooks.append(hook)
+
+    def add_reader(self, fd: int, callback: Callable[[], None]):
+        self._selector.register(fd, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, fd: int):
+        self._selector.unregister(fd)
+
+    def add_keyboard(self, on_key: Callable[[str], None]) -> bool:
+        """
+        Porta il terminale in modalità cbreak (tasti disponibili subito, senza invio; Ctrl-C resta
+        attivo) e invoca `on_key` per ogni tasto premuto. False se stdin non è un terminale.
+        """
+        if termios is None or not sys.stdin.isatty():
+            return False
+        self._stdin_fd = sys.stdin.fileno()
+        self._saved_tty = termios.tcgetattr(self._stdin_fd)
+        tty.setcbreak(self._stdin_fd)
+
+        def read_keys():
+            data = os.read(self._stdin_fd, 64).decode('utf-8', errors='ignore')
+            for key in data:
+                on_key(key)
+
+        self.add_reader(self._stdin_fd, read_keys)
+        return True
+
+    def run_in_thread(self, func: Callable, *args) -> Future:
+        """Esegue `func` in un thread di lavoro; il completamento risveglia il ciclo."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='loop-worker')
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._wake())
+        return future
+
+    # --- Esecuzione ---
+
+    def run_for(self, seconds: float):
+        """Elabora eventi per `seconds` secondi, dormendo quando non ce ne sono."""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._run_once(remaining)
+        self._run_hooks()
+
+    def run_until_complete(self, future: Future) -> Any:
+        """Elabora eventi finché `future` non è completato e ne restituisce il risultato."""
+        while not future.done():
+            self._run_once(None)
+        return future.result()
+
+    def call_in_thread(self, func: Callable, *args) -> Any:
+        """Esegue `func` in un thread di lavoro continuando a gestire gli eventi, e ne restituisce il risultato."""
+        return self.run_until_complete(self.run_in_thread(func, *args))
+
+    def _run_once(self, timeout: float | None):
+        if self._timers:
+            until_timer = max(0.0, self._timers[0][0] - time.monotonic())
+            timeout = until_timer if timeout is None else min(timeout, until_timer)
+        if self._ready:
+            timeout = 0
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                self._drain_wakeup()
+            else:
+                key.data()
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _, _, callback, args = heapq.heappop(self._timers)
+            callback(*args)
+        while self._ready:
+            callback, args = self._ready.popleft()
+            callback(*args)
+        self._run_hooks()
+
+    def _run_hooks(self):
+        for hook in self._wake_hooks:
+            hook()
+
+    def _wake(self):
+        try:
+            self._wakeup_write.send(b'\0')
+        except OSError:
+            pass  # buffer pieno o socket già chiuso: il ciclo è comunque in procinto di risvegliarsi
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_read.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def close(self):
+        """Ripristina terminale e wakeup fd dei segnali e libera le risorse."""
+        if self._saved_tty is not None:
+            termios.tcsetattr(self._stdin_fd, termios.TCSADRAIN, self._saved_tty)
+            self._saved_tty = None
+        if self._previous_wakeup_fd is not None:
+            signal.set_wakeup_fd(self._previous_wakeup_fd)
+            self._previous_wakeup_fd = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._selector.close()
+        self._wakeup_read.close()
+        self._wakeup_write.close()
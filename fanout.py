@@ -0,0 +1,317 @@
+# scoreboard_monitor/fanout.py
+
+import json
+import time
+import signal
+import argparse
+import threading
+from collections.abc import Mapping
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Iterator
+
+import requests
+
+import terminal_ui
+from alerts import AlertTracker, AlertDispatcher
+from event_loop import EventLoop
+from config import (
+    FANOUT_BIND_ADDRESS, FANOUT_PORT, FANOUT_KEEPALIVE_SECONDS, FANOUT_RECONNECT_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS, ANALYTICS_PANEL_ENABLED, COLOR_YELLOW, COLOR_RED, COLOR_RESET
+)
+
+def to_plain(value: Any) -> Any:
+    """Converte viste e sequenze (es. quelle di history_store) in dizionari e liste serializzabili in JSON."""
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    return value
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Differenza tra due stati come JSON Merge Patch (RFC 7386): contiene solo le chiavi cambiate,
+    ricorsivamente per i dizionari, con None per le chiavi rimosse.
+    """
+    patch = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = merge_patch(previous, value)
+            if nested:
+                patch[key] = nested
+        elif key not in old or previous != value:
+            patch[key] = value
+    return patch
+
+def apply_patch(target: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Restituisce `target` con la JSON Merge Patch applicata, senza modificarlo: i sottoalberi non
+    toccati dalla patch restano condivisi, così uno stato già consegnato non cambia mai.
+    """
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_patch(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+class FanoutHub:
+    """
+    Stato pubblicato ai client: ogni publish() calcola la patch rispetto allo stato precedente,
+    incrementa la versione e risveglia i client in attesa. Il lavoro per tick è lo stesso
+    qualunque sia il numero di client collegati.
+    """
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {}
+        self.version = 0
+        self._patch_json = None     # ultima patch serializzata (da versione - 1 a versione)
+        self._state_json = "{}"
+        self._condition = threading.Condition()
+
+    def publish(self, state: Dict[str, Any]):
+        state = to_plain(state)
+        with self._condition:
+            patch = merge_patch(self.state, state)
+            if not patch:
+                return
+            self.state = state
+            self.version += 1
+            self._patch_json = json.dumps(patch)
+            self._state_json = json.dumps(state)
+            self._condition.notify_all()
+
+    def snapshot(self) -> tuple:
+        """Versione corrente e stato completo serializzato."""
+        with self._condition:
+            return self.version, self._state_json
+
+    def wait_update(self, known_version: int, timeout: float) -> tuple:
+        """
+        Attende una versione successiva a `known_version`. Restituisce (versione, tipo, dati):
+        una patch se il client è indietro di una sola versione, altrimenti lo stato completo;
+        (known_version, None, None) allo scadere del timeout.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != known_version, timeout)
+            if self.version == known_version:
+                return known_version, None, None
+            if self.version == known_version + 1:
+                return self.version, 'patch', self._patch_json
+            return self.version, 'snapshot', self._state_json
+
+class FanoutServer(ThreadingHTTPServer):
+    """Server HTTP che espone lo stato del hub: `/snapshot` (JSON) e `/events` (Server-Sent Events)."""
+
+    daemon_threads = True
+
+    def __init__(self, hub: FanoutHub, address: tuple = (FANOUT_BIND_ADDRESS, FANOUT_PORT)):
+        super().__init__(address, _FanoutRequestHandler)
+        self.hub = hub
+        self.clients = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> "FanoutServer":
+        threading.Thread(target=self.serve_forever, name='fanout-http', daemon=True).start()
+        return self
+
+    def _client_delta(self, delta: int):
+        with self._lock:
+            self.clients += delta
+
+class _FanoutRequestHandler(BaseHTTPRequestHandler):
+    server: FanoutServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/snapshot':
+            version, state_json = self.server.hub.snapshot()
+            body = f'{{"version":{version},"state":{state_json}}}'.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == '/events':
+            self._stream_events()
+        else:
+            self.send_error(404)
+
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        hub = self.server.hub
+        self.server._client_delta(1)
+        try:
+            version, state_json = hub.snapshot()
+            self._send_event('snapshot', version, state_json)
+            while True:
+                new_version, kind, data = hub.wait_update(version, FANOUT_KEEPALIVE_SECONDS)
+                if kind is None:
+                    # Commento SSE: mantiene viva la connessione e rileva i client scollegati
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+                    continue
+                self._send_event(kind, new_version, data)
+                version = new_version
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server._client_delta(-1)
+
+    def _send_event(self, kind: str, version: int, data: str):
+        self.wfile.write(f"event: {kind}\nid: {version}\ndata: {data}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+# --- Client ---
+
+def _iter_lines(response: requests.Response) -> Iterator[str]:
+    """
+    Righe dello stream man mano che arrivano: read1() restituisce i byte già disponibili invece
+    di attendere un blocco di dimensione fissa, che ritarderebbe gli eventi piccoli.
+    """
+    pending = b''
+    while True:
+        chunk = response.raw.read1(64 * 1024)
+        if not chunk:
+            return
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line.rstrip(b'\r').decode('utf-8')
+
+def _read_events(response: requests.Response) -> Iterator[tuple]:
+    """Scompone uno stream Server-Sent Events in coppie (evento, dati)."""
+    event, data = 'message', []
+    for line in _iter_lines(response):
+        if not line:
+            if data:
+                yield event, '\n'.join(data)
+            event, data = 'message', []
+        elif line.startswith(':'):
+            continue
+        elif line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            data.append(line[5:].lstrip())
+
+def follow(url: str) -> Iterator[Dict[str, Any]]:
+    """
+    Segue lo stream `/events` del daemon e produce lo stato completo dopo ogni aggiornamento,
+    ricollegandosi automaticamente in caso di errore.
+    """
+    events_url = url.rstrip('/') + '/events'
+    state: Dict[str, Any] = {}
+    while True:
+        try:
+            # Timeout di lettura oltre l'intervallo dei keepalive: una connessione muta viene ripristinata
+            with requests.get(events_url, stream=True, timeout=(HTTP_CONNECT_TIMEOUT_SECONDS, FANOUT_KEEPALIVE_SECONDS * 3)) as response:
+                response.raise_for_status()
+                for event, data in _read_events(response):
+                    if event == 'snapshot':
+                        state = json.loads(data)
+                    elif event == 'patch':
+                        state = apply_patch(state, json.loads(data))
+                    else:
+                        continue
+                    yield state
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            print(f"{COLOR_RED}Connessione al daemon persa ({events_url}): {e}{COLOR_RESET}")
+        time.sleep(FANOUT_RECONNECT_SECONDS)
+
+def run_viewer(url: str):
+    """
+    Client leggero: visualizza con terminal_ui lo stato pubblicato dal daemon, senza interrogare
+    l'API. Gli aggiornamenti, il resize e i tasti (q per uscire, r per ridisegnare) sono eventi
+    di un EventLoop: tra un evento e l'altro il processo dorme.
+    """
+    loop = EventLoop()
+    state = None
+    needs_redraw = False
+    alert_tracker = AlertTracker()
+    alert_dispatcher = AlertDispatcher(bell=lambda: loop.call_soon_threadsafe(terminal_ui.play_alert_sound)).start()
+
+    def on_state(new_state):
+        nonlocal state, needs_redraw
+        state, needs_redraw = new_state, True
+        if state.get('team') and state.get('round') is not None:
+            alert_dispatcher.submit(alert_tracker.update(state['round'], state['team'].get('failing_services') or {}))
+
+    def on_resize(signum, frame):
+        nonlocal needs_redraw
+        needs_redraw = True
+
+    def on_key(key: str):
+        nonlocal needs_redraw
+        if key in 'qQ':
+            raise KeyboardInterrupt
+        if key == 'r':
+            terminal_ui.invalidate_screen()
+            needs_redraw = True
+
+    def redraw_if_needed():
+        nonlocal needs_redraw
+        if needs_redraw and state and state.get('team'):
+            needs_redraw = False
+            terminal_ui.display_scoreboard(
+                state['team'], state['status'], state.get('advice'), state.get('stale_since'),
+                state.get('analytics') if ANALYTICS_PANEL_ENABLED else None
+            )
+
+    def receive():
+        for new_state in follow(url):
+            loop.call_soon_threadsafe(on_state, new_state)
+
+    if hasattr(signal, 'SIGWINCH'):
+        signal.signal(signal.SIGWINCH, on_resize)
+    loop.on_wake(redraw_if_needed)
+    loop.add_keyboard(on_key)
+    threading.Thread(target=receive, name='fanout-client', daemon=True).start()
+    print(f"{COLOR_YELLOW}In attesa dei dati dal daemon {url}...{COLOR_RESET}")
+    try:
+        while True:
+            loop.run_for(3600)
+    except KeyboardInterrupt:
+        print("\nMonitoraggio interrotto dall'utente. Arrivederci!")
+    finally:
+        alert_dispatcher.close()
+        loop.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon di distribuzione dei dati del monitor e relativo client leggero.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="Esegue una sola volta il ciclo di download ed elaborazione e lo distribuisce ai client")
+    serve.add_argument(
+        '--bind', default=FANOUT_BIND_ADDRESS,
+        help="Indirizzo di ascolto (predefinito solo locale); i dati non sono protetti, es. usare l'indirizzo della VPN di squadra"
+    )
+    serve.add_argument('--port', type=int, default=FANOUT_PORT)
+    view = commands.add_parser('view', help="Visualizza i dati di un daemon in esecuzione")
+    view.add_argument('url', help="Indirizzo del daemon, es. http://10.0.0.5:8700")
+    args = parser.parse_args()
+
+    if args.command == 'view':
+        run_viewer(args.url)
+        return
+    import main as monitor
+    hub = FanoutHub()
+    server = FanoutServer(hub, (args.bind, args.port)).start()
+    print(f"{COLOR_YELLOW}Daemon in ascolto su http://{args.bind}:{args.port} (/events, /snapshot){COLOR_RESET}")
+    try:
+        monitor.main(publish=hub.publish, headless=True)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# scoreboard_monitor/history_store.py
+
+from collections.abc import Mapping
+from typing import Dict, Any, List, Iterator
+
+import numpy as np
+
+import columnar
+from columnar import FIELDS, FIELD_INDEX
+from alerts import checker_message
+from data_processor import CHECK_ACTION_MAP
+
+# Bit della matrice dei check: esito di S, P, G e presenza del servizio per il team nel round
+CHECK_BITS = {'S': 1, 'P': 2, 'G': 4}
+PRESENT_BIT = 128
+# Campi interi tra quelli numerici, restituiti come int dalle viste
+_INT_FIELDS = ('stolen', 'lost', 'successfulChecks', 'totalChecks')
+
+def _grown(array: np.ndarray, axis: int, size: int) -> np.ndarray:
+    """Restituisce `array` esteso lungo `axis` fino ad almeno `size` elementi (capacità raddoppiata)."""
+    if array.shape[axis] >= size:
+        return array
+    shape = list(array.shape)
+    shape[axis] = max(size, 2 * shape[axis], 1)
+    grown = np.zeros(shape, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+class GameHistory:
+    """
+    Storico compatto di tutti i round per tutti i team. Nomi di team e servizi sono internati
+    in indici interi; i contatori numerici stanno in un unico array (round × campi × team × servizi)
+    indicizzato direttamente dal numero di round, gli esiti dei check in una matrice di bit e i
+    messaggi di errore, deduplicati, in una mappa sparsa. Le selezioni per team, servizio o
+    intervallo di round sono viste NumPy, senza copie.
+    """
+
+    def __init__(self, round_capacity: int = 64):
+        self.team_names: List[str] = []
+        self.team_display_names: List[str] = []
+        self.team_index: Dict[str, int] = {}
+        self.service_names: List[str] = []
+        self.service_index: Dict[str, int] = {}
+        self.values = np.zeros((round_capacity, len(FIELDS), 0, 0))
+        self.checks = np.zeros((round_capacity, 0, 0), dtype=np.uint8)
+        self.team_scores = np.zeros((round_capacity, 0))
+        self.team_positions = np.zeros((round_capacity, 0), dtype=np.int32)
+        self.team_present = np.zeros((round_capacity, 0), dtype=bool)
+        self.round_present = np.zeros(round_capacity, dtype=bool)
+        self.service_order: Dict[int, tuple] = {}
+        # (round, team) -> {servizio: messaggio}, nell'ordine dei servizi del team
+        self.failures: Dict[tuple, Dict[int, str]] = {}
+        self._metrics_cache: Dict[tuple, Dict[str, np.ndarray]] = {}
+
+    # --- Costruzione ---
+
+    def _intern_team(self, team: dict) -> int:
+        shortname = team.get('shortname')
+        t = self.team_index.get(shortname)
+        if t is None:
+            t = self.team_index[shortname] = len(self.team_names)
+            self.team_names.append(shortname)
+            self.team_display_names.append(team.get('name'))
+        return t
+
+    def _intern_service(self, shortname: str) -> int:
+        s = self.service_index.get(shortname)
+        if s is None:
+            s = self.service_index[shortname] = len(self.service_names)
+            self.service_names.append(shortname)
+        return s
+
+    def _ensure_capacity(self, round_number: int):
+        rounds, teams, services = round_number + 1, len(self.team_names), len(self.service_names)
+        self.values = _grown(_grown(_grown(self.values, 0, rounds), 2, teams), 3, services)
+        self.checks = _grown(_grown(_grown(self.checks, 0, rounds), 1, teams), 2, services)
+        for name in ('team_scores', 'team_positions', 'team_present'):
+            setattr(self, name, _grown(_grown(getattr(self, name), 0, rounds), 1, teams))
+        self.round_present = _grown(self.round_present, 0, rounds)
+
+    def add_round(self, round_number: int, data: dict | None):
+        """Aggiunge (o sostituisce) il tabellone di un round."""
+        if not data or 'scoreboard' not in data:
+            return
+        rows = []
+        for team in data['scoreboard']:
+            t = self._intern_team(team)
+            for service in team.get('services', []):
+                rows.append((t, self._intern_service(service['shortname']), service))
+        order = tuple(self._intern_service(s_info['shortname']) for s_info in data.get('services') or [])
+        self._ensure_capacity(round_number)
+
+        r = round_number
+        if self.round_present[r]:
+            self.values[r] = 0
+            self.checks[r] = 0
+            self.team_present[r] = False
+            self.failures = {key: msgs for key, msgs in self.failures.items() if key[0] != r}
+        for team in data['scoreboard']:
+            t = self.team_index[team.get('shortname')]
+            self.team_present[r, t] = True
+            self.team_scores[r, t] = team.get('score', 0) or 0
+            self.team_positions[r, t] = team.get('position') or 0
+        if rows:
+            t_idx = [t for t, _, _ in rows]
+            s_idx = [s for _, s, _ in rows]
+            self.values[r][:, t_idx, s_idx] = np.asarray(
+                [[service.get(field, 0) for field in FIELDS] for _, _, service in rows], dtype=float
+            ).T
+            self.checks[r, t_idx, s_idx] = [self._check_bits(r, t, s, service) for t, s, service in rows]
+        self.service_order[r] = order
+        self.round_present[r] = True
+        self._metrics_cache = {}
+
+    def _check_bits(self, r: int, t: int, s: int, service: dict) -> int:
+        bits = PRESENT_BIT
+        results = {}
+        for check in service.get('checks', []):
+            action = check.get('action')
+            if action in CHECK_ACTION_MAP:
+                is_ok = check.get('exitCode') == 101
+                results[CHECK_ACTION_MAP[action]] = is_ok
+                if not is_ok:
+                    # Voce creata solo per i team con almeno un check fallito: lo storico resta sparso
+                    team_failures = self.failures.setdefault((r, t), {})
+                    if s not in team_failures:
+                        # checker_message restituisce la stessa stringa per output ripetuti: nessuna copia per round
+                        team_failures[s] = checker_message(check.get('stdout'))
+        for letter, ok in results.items():
+            if ok:
+                bits |= CHECK_BITS[letter]
+        return bits
+
+    # --- Selezioni (viste, senza copie) ---
+
+    def rounds(self) -> List[int]:
+        return np.flatnonzero(self.round_present).tolist()
+
+    def previous_round(self, round_number: int) -> int | None:
+        """Ultimo round presente prima di `round_number`."""
+        earlier = np.flatnonzero(self.round_present[:round_number])
+        return int(earlier[-1]) if earlier.size else None
+
+    def table(self, round_number: int) -> np.ndarray:
+        """Tabella (campi × team × servizi) di un round."""
+        return self.values[round_number, :, :len(self.team_names), :len(self.service_names)]
+
+    def round_range(self, start: int, stop: int) -> np.ndarray:
+        """Tabelle dei round [start, stop) come array (round × campi × team × servizi)."""
+        return self.values[start:stop, :, :len(self.team_names), :len(self.service_names)]
+
+    def team_series(self, team_shortname: str) -> np.ndarray:
+        """Serie storica di un team come array (round × campi × servizi)."""
+        return self.values[:, :, self.team_index[team_shortname], :len(self.service_names)]
+
+    def service_series(self, service_shortname: str) -> np.ndarray:
+        """Serie storica di un servizio come array (round × campi × team)."""
+        return self.values[:, :, :len(self.team_names), self.service_index[service_shortname]]
+
+    def metrics(self, round_number: int) -> Dict[str, np.ndarray]:
+        """Valori e variazioni (team × servizi) del round rispetto al round precedente presente."""
+        previous = self.previous_round(round_number)
+        key = (round_number, previous)
+        cached = self._metrics_cache.get(key)
+        if cached is None:
+            current_table = self.table(round_number)
+            previous_table = self.table(previous) if previous is not None else np.zeros_like(current_table)
+            cached = columnar.compute_metrics(current_table, previous_table)
+            self._metrics_cache = {key: cached}
+        return cached
+
+    def window_metrics(self, round_number: int, window: int) -> Dict[str, np.ndarray] | None:
+        """
+        Variazioni (team × servizi) negli ultimi `window` round fino a `round_number` compreso,
+        con SLA calcolato sui soli check della finestra; None se manca uno dei due round estremi.
+        """
+        start = round_number - window
+        if window <= 0 or start < 0 or round_number >= len(self.round_present):
+            return None
+        if not (self.round_present[start] and self.round_present[round_number]):
+            return None
+        # I contatori sono cumulativi: bastano i round estremi, anche con buchi nel mezzo
+        window_metrics = columnar.compute_window_metrics(self.round_range(start, round_number + 1), window)
+        return {name: values[-1] for name, values in window_metrics.items()}
+
+    def team_view(self, round_number: int, team_shortname: str) -> "ProcessedTeamView | None":
+        """Vista, nel formato di process_data_for_display, di un team in un round."""
+        t = self.team_index.get(team_shortname)
+        if t is None or round_number >= len(self.round_present) or not self.round_present[round_number]:
+            return None
+        if not self.team_present[round_number, t]:
+            return None
+        return ProcessedTeamView(self, round_number, t)
+
+class ServiceView(Mapping):
+    """Dati visualizzati di un servizio, letti direttamente dagli array dello storico."""
+
+    __slots__ = ('_history', '_round', '_t', '_s', '_metrics')
+
+    KEYS = (
+        'score', 'score_delta', 'sla', 'sla_delta', 'sla_adjusted_score', 'sla_adjusted_score_delta',
+        'attack_score', 'attack_flag', 'attack_score_delta', 'attack_flag_delta',
+        'defense_score', 'defense_flag', 'defense_score_delta', 'defense_flag_delta',
+        'checks', 'successfulChecks', 'totalChecks'
+    )
+    _RAW_FIELDS = {
+        'score': 'score', 'attack_score': 'attackerScore', 'attack_flag': 'stolen',
+        'defense_score': 'victimScore', 'defense_flag': 'lost',
+        'successfulChecks': 'successfulChecks', 'totalChecks': 'totalChecks'
+    }
+    _METRIC_FIELDS = (
+        'score_delta', 'sla', 'sla_delta', 'sla_adjusted_score', 'sla_adjusted_score_delta',
+        'attack_score_delta', 'defense_score_delta'
+    )
+
+    def __init__(self, history: GameHistory, round_number: int, t: int, s: int, metrics: Dict[str, np.ndarray]):
+        self._history, self._round, self._t, self._s, self._metrics = history, round_number, t, s, metrics
+
+    def __getitem__(self, key: str):
+        if key in self._RAW_FIELDS:
+            field = self._RAW_FIELDS[key]
+            value = self._history.values[self._round, FIELD_INDEX[field], self._t, self._s]
+            return int(value) if field in _INT_FIELDS else float(value)
+        if key in self._METRIC_FIELDS:
+            return float(self._metrics[key][self._t, self._s])
+        if key in ('attack_flag_delta', 'defense_flag_delta'):
+            return int(self._metrics[key][self._t, self._s])
+        if key == 'checks':
+            bits = self._history.checks[self._round, self._t, self._s]
+            return [{'action': letter, 'ok': bool(bits & bit)} for letter, bit in CHECK_BITS.items()]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+class ServicesView(Mapping):
+    """Servizi di un team in un round, nell'ordine della lista `services` del tabellone."""
+
+    __slots__ = ('_history', '_round', '_t', '_metrics', '_order')
+
+    def __init__(self, history: GameHistory, round_number: int, t: int, metrics: Dict[str, np.ndarray]):
+        self._history, self._round, self._t, self._metrics = history, round_number, t, metrics
+        present = history.checks[round_number, t] & PRESENT_BIT
+        order = history.service_order.get(round_number) or range(len(history.service_names))
+        self._order = {history.service_names[s]: s for s in order if s < len(present) and present[s]}
+
+    def __getitem__(self, s_name: str) -> ServiceView:
+        return ServiceView(self._history, self._round, self._t, self._order[s_name], self._metrics)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+class ProcessedTeamView(Mapping):
+    """Vista di un team in un round con le stesse chiavi del risultato di process_data_for_display."""
+
+    __slots__ = ('_history', '_round', '_t', '_services')
+
+    KEYS = ('name', 'shortname', 'position', 'score', 'score_delta', 'services', 'failing_services')
+
+    def __init__(self, history: GameHistory, round_number: int, t: int):
+        self._history, self._round, self._t = history, round_number, t
+        self._services = ServicesView(history, round_number, t, history.metrics(round_number))
+
+    def __getitem__(self, key: str) -> Any:
+        history, r, t = self._history, self._round, self._t
+        if key == 'name':
+            return history.team_display_names[t]
+        if key == 'shortname':
+            return history.team_names[t]
+        if key == 'position':
+            return int(history.team_positions[r, t])
+        if key == 'score':
+            return float(history.team_scores[r, t])
+        if key == 'score_delta':
+            previous = history.previous_round(r)
+            if previous is None or not history.team_present[previous, t]:
+                return 0.0
+            return float(history.team_scores[r, t] - history.team_scores[previous, t])
+        if key == 'services':
+            return self._services
+        if key == 'failing_services':
+            return {history.service_names[s]: message for s, message in history.failures.get((r, t), {}).items()}
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
@@ -0,0 +1,159 @@
+# scoreboard_monitor/json_stream.py
+
+import json
+from typing import Iterable, Collection
+
+# Decodifica di un singolo valore JSON a partire da una posizione, con lo scanner in C di json
+_decode_value = json.JSONDecoder().raw_decode
+_WHITESPACE = ' \t\n\r'
+
+# Stati del parser: attesa dell'oggetto radice, di una chiave, dei due punti, di un valore,
+# di ',' o '}' dopo un valore, di un team (o ']') e di ',' o ']' dopo un team
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE, _TEAM, _AFTER_TEAM, _DONE = range(8)
+
+class SelectiveScoreboardParser:
+    """
+    Parser incrementale di `scoreboard/table/<tick>` che conserva solo i team richiesti.
+
+    Il testo viene fornito a pezzi con `feed()`. Ogni team della lista `scoreboard` viene
+    decodificato da solo, con lo scanner in C del modulo json, appena è completo nel buffer, e
+    scartato subito se il suo `shortname` non è tra quelli richiesti: il buffer trattiene al più
+    il team in corso di lettura e la memoria non cresce con la dimensione del tabellone. Le chiavi
+    di primo livello diverse da `scoreboard` (es. `services`) vengono decodificate normalmente.
+    """
+
+    def __init__(self, teams: Collection[str] | None = None, team_fields: Collection[str] | None = None):
+        self.teams = set(teams) if teams is not None else None
+        self.team_fields = set(team_fields) | {'shortname'} if team_fields is not None else None
+        self.result = {}
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        # Un valore incompleto viene ritentato solo dopo che il buffer è almeno raddoppiato,
+        # così un team lungo ricevuto a piccoli frammenti costa comunque un tempo lineare
+        self._retry_at = 0
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def _skip_whitespace(self) -> str | None:
+        """Primo carattere significativo da `_pos` in poi (None se il buffer è esaurito)."""
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _value(self):
+        """
+        Decodifica il valore che inizia in `_pos`, o solleva _Incomplete se non è ancora tutto nel
+        buffer. Il valore deve essere seguito da almeno un carattere: un numero alla fine del
+        buffer potrebbe continuare nel frammento successivo.
+        """
+        if len(self._buf) < self._retry_at:
+            raise _Incomplete
+        try:
+            value, end = _decode_value(self._buf, self._pos)
+        except json.JSONDecodeError:
+            value, end = None, len(self._buf)
+        if end >= len(self._buf):
+            self._retry_at = len(self._buf) + max(len(self._buf) - self._pos, 1)
+            raise _Incomplete
+        self._retry_at = 0
+        self._pos = end
+        return value
+
+    def feed(self, text: str):
+        """Elabora un nuovo frammento del corpo della risposta."""
+        self._buf = self._buf[self._pos:] + text
+        self._retry_at = max(0, self._retry_at - self._pos)
+        self._pos = 0
+        try:
+            while self._state != _DONE:
+                ch = self._skip_whitespace()
+                if ch is None:
+                    break
+                self._step(ch)
+        except _Incomplete:
+            pass
+
+    def _step(self, ch: str):
+        state = self._state
+        if state == _TEAM:
+            if ch == ']':
+                self._pos += 1
+                self._state = _AFTER_VALUE
+                return
+            self._add_team(self._value())
+            self._state = _AFTER_TEAM
+        elif state == _AFTER_TEAM:
+            if ch not in ',]':
+                raise self._error("Atteso ',' o ']' dopo un team")
+            self._pos += 1
+            self._state = _TEAM if ch == ',' else _AFTER_VALUE
+        elif state == _START:
+            if ch != '{':
+                raise self._error("Il tabellone non è un oggetto JSON")
+            self._pos += 1
+            self._state = _KEY
+        elif state == _KEY:
+            if ch == '}':
+                self._pos += 1
+                self._state = _DONE
+                return
+            if ch != '"':
+                raise self._error("Attesa una chiave")
+            self._key = self._value()
+            self._state = _COLON
+        elif state == _COLON:
+            if ch != ':':
+                raise self._error("Atteso ':'")
+            self._pos += 1
+            self._state = _VALUE
+        elif state == _VALUE:
+            if self._key == 'scoreboard' and ch == '[':
+                self._pos += 1
+                self.result['scoreboard'] = []
+                self._state = _TEAM
+            else:
+                self.result[self._key] = self._value()
+                self._state = _AFTER_VALUE
+        elif state == _AFTER_VALUE:
+            if ch not in ',}':
+                raise self._error("Atteso ',' o '}'")
+            self._pos += 1
+            self._state = _KEY if ch == ',' else _DONE
+
+    def _add_team(self, team):
+        if not isinstance(team, dict):
+            raise self._error("Elemento di `scoreboard` non valido")
+        if self.teams is not None and team.get('shortname') not in self.teams:
+            return
+        if self.team_fields is not None:
+            team = {key: value for key, value in team.items() if key in self.team_fields}
+        self.result['scoreboard'].append(team)
+
+    def close(self) -> dict:
+        """Conclude il parsing e restituisce il tabellone con i soli team richiesti."""
+        if self._state != _DONE:
+            # Ultimo tentativo sul valore rimasto in sospeso, senza attendere che il buffer raddoppi
+            self._retry_at = 0
+            self.feed('')
+        if self._state != _DONE:
+            raise self._error("Corpo JSON del tabellone incompleto")
+        return self.result
+
+class _Incomplete(Exception):
+    """Il valore in lettura prosegue nel prossimo frammento."""
+
+def parse_scoreboard(
+    chunks: Iterable[str] | str,
+    teams: Collection[str] | None = None,
+    team_fields: Collection[str] | None = None
+) -> dict:
+    """Decodifica un tabellone (intero o a frammenti) materializzando solo i team richiesti."""
+    parser = SelectiveScoreboardParser(teams, team_fields)
+    for chunk in ([chunks] if isinstance(chunks, str) else chunks):
+        parser.feed(chunk)
+    return parser.close()
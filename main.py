@@ -3,141 +3,308 @@
 import time
 from datetime import datetime
 import signal
+from functools import partial
+from typing import Callable
 
 import api_client
 import data_processor
+import fanout
+import metrics
 import terminal_ui
-from config import TARGET_TEAM_SHORTNAME, DEFAULT_TICK_DURATION_SECONDS, COLOR_YELLOW, COLOR_RESET, COLOR_RED, COLOR_GREEN, COLOR_BOLD
+from advice_engine import ShutdownAdvisor
+from alerts import AlertTracker, AlertDispatcher
+from analytics import ScoreboardAnalytics
+from backfill import HistoryBackfill
+from event_loop import EventLoop
+from history_store import GameHistory
+from resilience import Backoff
+from round_cache import RoundCache
+from tick_scheduler import TickScheduler
+from config import TARGET_TEAM_SHORTNAME, ROUND_CACHE_DIR, FANOUT_SERVER_URL, ANALYTICS_PANEL_ENABLED, SCOREBOARD_SELECTIVE_PARSE, BACKFILL_ENABLED, COLOR_YELLOW, COLOR_RESET, COLOR_RED, COLOR_GREEN, COLOR_BOLD
+
+# Team da decodificare nei tabelloni (None = tutti)
+SCOREBOARD_TEAMS = (TARGET_TEAM_SHORTNAME,) if SCOREBOARD_SELECTIVE_PARSE else None
 
 NEEDS_REDRAW = False
 def handle_resize(signum, frame):
     global NEEDS_REDRAW
     NEEDS_REDRAW = True
 
-def synchronize_and_wait_for_next_tick(initial_round: int):
+def synchronize_and_wait_for_next_tick(initial_round: int, scheduler: TickScheduler, sleep=time.sleep, fetch_status=api_client.fetch_game_status):
     print(f"\n{COLOR_YELLOW}Snapshot visualizzato. In attesa del round {initial_round + 1} per la sincronizzazione...{COLOR_RESET}")
-    while True:
-        time.sleep(5)
-        current_status = api_client.fetch_game_status()
-        if current_status and current_status.get('scoreboardRound') is not None:
-            new_round = current_status.get('scoreboardRound')
-            if new_round > initial_round:
-                print(f"\n{COLOR_GREEN}Sincronizzato!{COLOR_RESET} Caricamento dati per il round {COLOR_BOLD}{new_round}{COLOR_RESET}.")
-                time.sleep(1)
-                return current_status
-    return None
-
-def main():
-    if hasattr(signal, 'SIGWINCH'):
+    current_status = scheduler.wait_for_round(initial_round + 1, fetch_status, sleep)
+    new_round = current_status.get('scoreboardRound')
+    print(f"\n{COLOR_GREEN}Sincronizzato!{COLOR_RESET} Caricamento dati per il round {COLOR_BOLD}{new_round}{COLOR_RESET}.")
+    return current_status
+
+def record_tick(round_number: int, scheduler: TickScheduler):
+    """
+    Chiude il record metrico del tick, con il ritardo tra cambio round e visualizzazione se il
+    cambio è stato osservato dallo scheduler (non per il round già in corso all'avvio).
+    """
+    if not metrics.enabled():
+        return
+    rollover = scheduler.rollover_time(round_number)
+    lag = time.time() - rollover if rollover is not None else None
+    if lag is not None:
+        metrics.observe('tick_detection_lag', lag)
+    metrics.end_tick(round_number)
+
+def main(publish: Callable[[dict], None] | None = None, headless: bool = False):
+    """
+    Ciclo di monitoraggio. Con `publish` ogni stato visualizzato (round, stato, dati del team e
+    consigli) viene anche passato alla funzione indicata, es. fanout.FanoutHub.publish; con
+    `headless` non viene disegnato nulla sul terminale.
+    """
+    if FANOUT_SERVER_URL and publish is None:
+        # Client leggero: i dati arrivano già elaborati dal daemon condiviso
+        fanout.run_viewer(FANOUT_SERVER_URL)
+        return
+    if hasattr(signal, 'SIGWINCH') and not headless:
         signal.signal(signal.SIGWINCH, handle_resize)
+    metrics.setup()
+    metrics.start_tick()
+    loop = EventLoop()
+    # Le notifiche partono da un thread dedicato; il segnale acustico viene emesso dal ciclo, come il rendering
+    alert_dispatcher = None if headless else AlertDispatcher(
+        bell=lambda: loop.call_soon_threadsafe(terminal_ui.play_alert_sound)
+    ).start()
+    try:
+        run_monitor(loop, publish, headless, alert_dispatcher)
+    except KeyboardInterrupt:
+        print("\nMonitoraggio interrotto dall'utente. Arrivederci!")
+        if metrics.enabled():
+            print(metrics.format_summary())
+    finally:
+        if alert_dispatcher is not None:
+            alert_dispatcher.close()
+        loop.close()
+        metrics.shutdown()
 
+def run_monitor(loop: EventLoop, publish: Callable[[dict], None] | None, headless: bool, alert_dispatcher: AlertDispatcher | None = None):
+    """
+    Corpo del monitoraggio. Tutte le attese passano da `loop`: richieste HTTP, timer dei tick,
+    resize e tasti sono eventi, e tra un evento e l'altro il processo dorme.
+    """
     print(f"{COLOR_YELLOW}Recupero snapshot iniziale della scoreboard...{COLOR_RESET}")
-    status_data = api_client.fetch_game_status()
+    status_data = loop.call_in_thread(api_client.fetch_game_status)
     if not status_data or status_data.get('scoreboardRound') is None:
         print(f"{COLOR_RED}Impossibile recuperare lo stato iniziale. Uscita.{COLOR_RESET}")
         return
+    if ROUND_CACHE_DIR:
+        api_client.set_round_cache(RoundCache.for_game(status_data))
+    bundle = loop.call_in_thread(partial(api_client.fetch_tick_bundle, status_data=status_data, teams=SCOREBOARD_TEAMS))
+    if not bundle: return
 
-    current_round = status_data.get('scoreboardRound')
+    status_data = bundle['status']
+    current_round = bundle['round']
+    scheduler = TickScheduler()
+    scheduler.observe(status_data)
     
     if current_round == 0:
         print("La partita è al round 0. In attesa del primo round per iniziare...")
-        status_data = synchronize_and_wait_for_next_tick(0)
+        status_data = synchronize_and_wait_for_next_tick(0, scheduler, loop.run_for, partial(loop.call_in_thread, api_client.fetch_game_status))
         if not status_data: return
-        current_round = status_data.get('scoreboardRound')
+        bundle = loop.call_in_thread(partial(api_client.fetch_tick_bundle, status_data=status_data, teams=SCOREBOARD_TEAMS))
+        if not bundle: return
+        current_round = bundle['round']
 
     print(f"Visualizzazione dei dati per il round attuale: {COLOR_BOLD}{current_round}{COLOR_RESET}")
     
-    # Inizializza lo storico delle perdite
-    service_loss_history = {}
+    # Storico compatto dei tabelloni ricevuti, da cui vengono lette le viste visualizzate
+    history = GameHistory()
+    # Motore dei consigli con lo storico delle perdite; i round già conclusi vengono recuperati in background
+    advisor = ShutdownAdvisor()
+    backfill = None
+    last_processed_data = None
+    last_status_data = None
+    # Vista interattiva: team mostrato (tasto t/T) e visibilità dei consigli (tasto a)
+    view_team = TARGET_TEAM_SHORTNAME
+    show_advice = True
+    show_analytics = ANALYTICS_PANEL_ENABLED
+    # Classifiche per servizio, first blood e variazioni di posizione sull'intero tabellone
+    analytics = ScoreboardAnalytics()
+    displayed_round = None
+    # Istante dell'ultimo aggiornamento riuscito e stato dei dati visualizzati (stale-while-revalidate)
+    last_update_time = None
+    stale = False
+    retry_backoff = Backoff()
+    # Transizioni dei servizi in errore, notificate tramite `alert_dispatcher`
+    alert_tracker = AlertTracker()
+
+    def merge_backfill():
+        """Antepone allo storico live quello ricostruito dal backfill, una volta completato."""
+        nonlocal backfill
+        global NEEDS_REDRAW
+        if backfill is None or not backfill.done.is_set():
+            return
+        advisor.seed(backfill.loss_history)
+        backfill = None
+        NEEDS_REDRAW = True
+
+    def show(team_data, status, shutdown_advice):
+        """Disegna la schermata (se non headless) e pubblica lo stato ai client del daemon."""
+        stale_since = last_update_time if stale else None
+        analytics_summary = analytics.summary() if publish is not None or show_analytics else None
+        if publish is not None:
+            publish({
+                'round': status.get('scoreboardRound'), 'status': status, 'team': team_data,
+                'advice': shutdown_advice, 'stale_since': stale_since, 'analytics': analytics_summary
+            })
+        if headless:
+            return
+        if view_team != TARGET_TEAM_SHORTNAME and displayed_round is not None:
+            # Altro team selezionato: i consigli sono calcolati solo per il team monitorato
+            other_team = data_processor.process_history_for_display(history, displayed_round, view_team)
+            if other_team:
+                team_data, shutdown_advice = other_team, {}
+        with metrics.span('render'):
+            terminal_ui.display_scoreboard(
+                team_data, status, shutdown_advice if show_advice else {}, stale_since,
+                analytics_summary if show_analytics else None
+            )
+
+    def redraw_if_needed():
+        global NEEDS_REDRAW
+        if NEEDS_REDRAW:
+            NEEDS_REDRAW = False
+            if last_processed_data and last_status_data:
+                show(last_processed_data, last_status_data, advisor.advise(last_processed_data, last_status_data))
+
+    def on_key(key: str):
+        nonlocal view_team, show_advice, show_analytics
+        global NEEDS_REDRAW
+        if key in 'qQ':
+            raise KeyboardInterrupt
+        if key in 'tT' and history.team_names:
+            teams = history.team_names
+            index = teams.index(view_team) if view_team in teams else 0
+            view_team = teams[(index + (1 if key == 't' else -1)) % len(teams)]
+        elif key == 'a':
+            show_advice = not show_advice
+        elif key == 'v':
+            show_analytics = not show_analytics
+        elif key == 'r':
+            terminal_ui.invalidate_screen()
+        else:
+            return
+        NEEDS_REDRAW = True
 
-    snapshot_scoreboard_data = api_client.fetch_scoreboard_data(current_round)
-    snapshot_previous_data = api_client.fetch_scoreboard_data(current_round - 1)
+    def mark_stale():
+        """Un aggiornamento è fallito: l'ultimo snapshot resta visibile, segnalato come non aggiornato."""
+        nonlocal stale
+        if not last_processed_data:
+            print(f"{COLOR_YELLOW}Impossibile recuperare lo stato della partita. Riprovo...{COLOR_RESET}")
+            return
+        stale = True
+        # Ridisegno completo: copre anche gli eventuali messaggi di errore stampati sopra il frame
+        terminal_ui.invalidate_screen()
+        show(last_processed_data, last_status_data, advisor.advise(last_processed_data, last_status_data))
+
+    def poll_status():
+        status = loop.call_in_thread(api_client.fetch_game_status)
+        if status is None:
+            mark_stale()
+        return status
+
+    def present(round_number: int, team_data, status):
+        """Aggiorna i consigli con il nuovo round e mostra i dati elaborati."""
+        nonlocal last_processed_data, last_status_data, last_update_time, stale, displayed_round
+        with metrics.span('advice'):
+            advisor.update(round_number, team_data)
+            shutdown_advice = advisor.advise(team_data, status)
+        last_processed_data = team_data
+        last_status_data = status
+        last_update_time = time.time()
+        displayed_round = round_number
+        stale = False
+        retry_backoff.reset()
+        show(team_data, status, shutdown_advice)
+        if alert_dispatcher is not None:
+            alert_dispatcher.submit(alert_tracker.update(round_number, team_data['failing_services']))
+        record_tick(round_number, scheduler)
+
+    # Il resize (SIGWINCH) risveglia il ciclo tramite il wakeup fd; il ridisegno avviene subito dopo
+    loop.on_wake(redraw_if_needed)
+    if not headless:
+        loop.add_keyboard(on_key)
+    if BACKFILL_ENABLED:
+        backfill = HistoryBackfill(TARGET_TEAM_SHORTNAME, current_round - 1).start(
+            on_done=lambda: loop.call_soon_threadsafe(merge_backfill)
+        )
+
+    snapshot_scoreboard_data = bundle['current']
+    snapshot_previous_data = bundle['previous']
 
     if not snapshot_scoreboard_data:
         print(f"{COLOR_RED}Impossibile recuperare i dati della scoreboard per il round {current_round}.{COLOR_RESET}")
     else:
-        processed_snapshot = data_processor.process_data_for_display(
-            snapshot_scoreboard_data, snapshot_previous_data, TARGET_TEAM_SHORTNAME
-        )
+        if snapshot_previous_data:
+            history.add_round(current_round - 1, snapshot_previous_data)
+            analytics.update(history, current_round - 1)
+        with metrics.span('process'):
+            history.add_round(current_round, snapshot_scoreboard_data)
+            analytics.update(history, current_round)
+            processed_snapshot = data_processor.process_history_for_display(history, current_round, TARGET_TEAM_SHORTNAME)
         if processed_snapshot:
-            # Aggiorna lo storico con i dati dello snapshot
-            if processed_snapshot.get('services'):
-                for s_name, s_data in processed_snapshot['services'].items():
-                    if s_name not in service_loss_history: service_loss_history[s_name] = []
-                    loss = abs(s_data['defense_score_delta'])
-                    if loss > 0: service_loss_history[s_name].insert(0, loss)
-                    service_loss_history[s_name] = service_loss_history[s_name][:5]
-
-            shutdown_advice = data_processor.calculate_shutdown_advice(processed_snapshot, status_data, service_loss_history)
-            terminal_ui.display_scoreboard(processed_snapshot, status_data, shutdown_advice)
-            if processed_snapshot.get('failing_services'):
-                terminal_ui.play_alert_sound()
+            present(current_round, processed_snapshot, status_data)
     
-    status_data = synchronize_and_wait_for_next_tick(current_round)
+    status_data = synchronize_and_wait_for_next_tick(current_round, scheduler, loop.run_for, poll_status)
     if not status_data: return
 
     last_processed_round = current_round
-    previous_scoreboard_data = snapshot_scoreboard_data
-    last_processed_data = None
-    last_status_data = None
 
     while True:
         try:
-            if status_data is None:
-                status_data = api_client.fetch_game_status()
+            # Senza uno stato già noto, stato e tabellone del round atteso vengono richiesti in parallelo
+            speculative = status_data is None
+            bundle = loop.call_in_thread(partial(
+                api_client.fetch_tick_bundle,
+                last_processed_round + 1, include_previous=False, status_data=status_data, teams=SCOREBOARD_TEAMS
+            ))
             
-            if not status_data:
-                print(f"{COLOR_YELLOW}Impossibile recuperare lo stato della partita. Riprovo...{COLOR_RESET}")
-                time.sleep(30)
+            if not bundle:
+                status_data = None
+                mark_stale()
+                loop.run_for(retry_backoff.next_delay())
                 continue
 
-            scoreboard_round = status_data.get('scoreboardRound')
+            status_data = bundle['status']
+            scoreboard_round = bundle['round']
+            if speculative:
+                scheduler.observe(status_data)
+            advanced = False
             
-            if scoreboard_round is not None and scoreboard_round > last_processed_round:
-                current_scoreboard_data = api_client.fetch_scoreboard_data(scoreboard_round)
-                if current_scoreboard_data:
-                    processed_data = data_processor.process_data_for_display(
-                        current_scoreboard_data, previous_scoreboard_data, TARGET_TEAM_SHORTNAME
-                    )
+            if scoreboard_round > last_processed_round:
+                current_scoreboard_data = bundle['current']
+                if not current_scoreboard_data:
+                    mark_stale()
+                else:
+                    with metrics.span('process'):
+                        history.add_round(scoreboard_round, current_scoreboard_data)
+                        analytics.update(history, scoreboard_round)
+                        processed_data = data_processor.process_history_for_display(history, scoreboard_round, TARGET_TEAM_SHORTNAME)
                     if processed_data:
-                        # Aggiorna lo storico con i nuovi dati
-                        if processed_data.get('services'):
-                            for s_name, s_data in processed_data['services'].items():
-                                if s_name not in service_loss_history: service_loss_history[s_name] = []
-                                loss = abs(s_data['defense_score_delta'])
-                                service_loss_history[s_name].insert(0, loss)
-                                service_loss_history[s_name] = service_loss_history[s_name][:5]
-
-                        shutdown_advice = data_processor.calculate_shutdown_advice(processed_data, status_data, service_loss_history)
-                        last_processed_data = processed_data
-                        last_status_data = status_data
-                        terminal_ui.display_scoreboard(processed_data, status_data, shutdown_advice)
-                        if processed_data.get('failing_services'):
-                            terminal_ui.play_alert_sound()
-                        
-                        previous_scoreboard_data = current_scoreboard_data
+                        present(scoreboard_round, processed_data, status_data)
                         last_processed_round = scoreboard_round
+                        advanced = True
 
-            global NEEDS_REDRAW
-            wait_duration = status_data.get('roundTime', DEFAULT_TICK_DURATION_SECONDS)
-            sleep_start_time = time.time()
-            
-            while time.time() - sleep_start_time < wait_duration:
-                if NEEDS_REDRAW:
-                    NEEDS_REDRAW = False
-                    if last_processed_data and last_status_data:
-                        shutdown_advice = data_processor.calculate_shutdown_advice(last_processed_data, last_status_data, service_loss_history)
-                        terminal_ui.display_scoreboard(last_processed_data, last_status_data, shutdown_advice)
-                time.sleep(0.2)
-            
-            status_data = None
+            predicted = scheduler.predicted_rollover(last_processed_round + 1)
+            if advanced and predicted is not None:
+                # Si dorme fino al cambio previsto e poi si richiedono insieme stato e tabellone:
+                # se il round è già cambiato il tabellone arriva senza attendere prima lo stato.
+                # Il margine di mezzo intervallo di poll copre l'incertezza della stima del cambio
+                loop.run_for(max(0.0, predicted + scheduler.dense_interval / 2 - time.time()))
+                status_data = None
+            else:
+                # Richiesta speculativa troppo precoce (o cambio non prevedibile): poll fitti dello scheduler
+                status_data = scheduler.wait_for_round(last_processed_round + 1, poll_status, loop.run_for)
 
-        except KeyboardInterrupt:
-            print("\nMonitoraggio interrotto dall'utente. Arrivederci!")
-            break
         except Exception as e:
             print(f"{COLOR_RED}Errore inaspettato nel loop principale: {e}{COLOR_RESET}")
-            time.sleep(30)
+            status_data = None
+            mark_stale()
+            loop.run_for(retry_backoff.next_delay())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,231 @@
+# scoreboard_monitor/metrics.py
+
+import json
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext, contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any
+
+from config import METRICS_ENABLED, METRICS_JSONL_FILE, METRICS_HTTP_PORT, METRICS_SUMMARY_WINDOW
+
+# Quantili riportati nel riepilogo e nell'endpoint Prometheus
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+# Con la strumentazione disattivata span() restituisce sempre questo contesto vuoto
+_NULL_SPAN = nullcontext()
+
+_enabled = False
+_lock = threading.Lock()
+# Durate recenti (s) per fase, loro somma e numero cumulativi, e contatori cumulativi
+_durations: Dict[str, deque] = {}
+_totals: Dict[str, list] = {}
+_counters: Dict[str, float] = {}
+# Record del tick in corso: durate sommate per fase e contatori del solo tick
+_tick_spans: Dict[str, float] = {}
+_tick_counters: Dict[str, float] = {}
+_tick_started = None
+_jsonl_file = None
+_http_server = None
+# Per thread: True mentre si esegue lavoro in background (vedi background())
+_context = threading.local()
+
+class _Span:
+    """Misura la durata di un blocco `with` e la registra sotto il nome della fase."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+def enabled() -> bool:
+    return _enabled
+
+def setup(enabled: bool = METRICS_ENABLED, jsonl_path: str | None = METRICS_JSONL_FILE, http_port: int | None = METRICS_HTTP_PORT):
+    """Attiva la strumentazione e le esportazioni configurate (file JSONL, endpoint HTTP locale)."""
+    global _enabled, _jsonl_file, _http_server
+    _enabled = enabled
+    if not enabled:
+        return
+    if jsonl_path and _jsonl_file is None:
+        _jsonl_file = open(jsonl_path, 'a', encoding='utf-8', buffering=1)
+    if http_port and _http_server is None:
+        _http_server = ThreadingHTTPServer(('127.0.0.1', http_port), _MetricsRequestHandler)
+        threading.Thread(target=_http_server.serve_forever, name='metrics-http', daemon=True).start()
+
+def shutdown():
+    global _jsonl_file, _http_server
+    if _jsonl_file is not None:
+        _jsonl_file.close()
+        _jsonl_file = None
+    if _http_server is not None:
+        _http_server.shutdown()
+        _http_server.server_close()
+        _http_server = None
+
+@contextmanager
+def background():
+    """
+    Attribuisce le misure del thread corrente al lavoro in background (es. il backfill): vengono
+    registrate con il prefisso `background_` e non entrano nel record del tick live.
+    """
+    previous = getattr(_context, 'background', False)
+    _context.background = True
+    try:
+        yield
+    finally:
+        _context.background = previous
+
+def span(name: str):
+    """Contesto che misura una fase della pipeline; senza strumentazione non fa nulla."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+def observe(name: str, seconds: float):
+    """Registra una durata (o un ritardo) misurata per la fase indicata."""
+    if not _enabled:
+        return
+    is_background = getattr(_context, 'background', False)
+    if is_background:
+        name = f"background_{name}"
+    with _lock:
+        samples = _durations.get(name)
+        if samples is None:
+            samples = _durations[name] = deque(maxlen=METRICS_SUMMARY_WINDOW)
+            _totals[name] = [0.0, 0]
+        samples.append(seconds)
+        totals = _totals[name]
+        totals[0] += seconds
+        totals[1] += 1
+        if not is_background:
+            _tick_spans[name] = _tick_spans.get(name, 0.0) + seconds
+
+def count(name: str, value: float = 1):
+    """Incrementa un contatore (richieste, byte trasferiti, ...)."""
+    if not _enabled:
+        return
+    is_background = getattr(_context, 'background', False)
+    if is_background:
+        name = f"background_{name}"
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+        if not is_background:
+            _tick_counters[name] = _tick_counters.get(name, 0) + value
+
+def start_tick():
+    """Apre il record di un nuovo tick: le misure successive gli vengono attribuite."""
+    global _tick_started
+    if not _enabled:
+        return
+    with _lock:
+        _tick_spans.clear()
+        _tick_counters.clear()
+        _tick_started = time.time()
+
+def end_tick(round_number: int, **extra: Any):
+    """
+    Chiude il record del tick corrente e lo accoda al file JSONL, se configurato; le misure
+    successive (es. i poll in attesa del prossimo round) vanno al record del tick seguente.
+    """
+    global _tick_started
+    if not _enabled:
+        return
+    with _lock:
+        record = {
+            'round': round_number,
+            'timestamp': time.time(),
+            'elapsed': time.time() - _tick_started if _tick_started is not None else None,
+            'spans': dict(_tick_spans),
+            'counters': dict(_tick_counters),
+            **extra,
+        }
+        _tick_spans.clear()
+        _tick_counters.clear()
+        _tick_started = time.time()
+    if _jsonl_file is not None:
+        _jsonl_file.write(json.dumps(record) + '\n')
+
+def _quantile(sorted_samples: list, q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+def summary() -> Dict[str, Any]:
+    """
+    Riepilogo delle ultime METRICS_SUMMARY_WINDOW misure per fase (con somma e numero cumulativi
+    di tutte le misure in `total` e `total_count`), più i contatori cumulativi.
+    """
+    with _lock:
+        durations = {name: sorted(samples) for name, samples in _durations.items() if samples}
+        totals = {name: tuple(values) for name, values in _totals.items()}
+        counters = dict(_counters)
+    stages = {}
+    for name, samples in durations.items():
+        stages[name] = {
+            'count': len(samples),
+            'mean': sum(samples) / len(samples),
+            'max': samples[-1],
+            'total': totals[name][0],
+            'total_count': totals[name][1],
+            **{f"p{int(q * 100)}": _quantile(samples, q) for q in SUMMARY_QUANTILES},
+        }
+    return {'stages': stages, 'counters': counters}
+
+def format_summary() -> str:
+    """Tabella testuale del riepilogo, in millisecondi."""
+    data = summary()
+    lines = [f"{'Fase':<28}{'n':>6}{'p50':>10}{'p95':>10}{'max':>10}"]
+    for name, stats in sorted(data['stages'].items()):
+        lines.append(
+            f"{name:<28}{stats['count']:>6}{stats['p50'] * 1e3:>8.1f}ms{stats['p95'] * 1e3:>8.1f}ms{stats['max'] * 1e3:>8.1f}ms"
+        )
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f"{name:<28}{value:>6.0f}")
+    return '\n'.join(lines)
+
+def _format_counter(value: float) -> str:
+    """Valore di un contatore senza perdita di cifre (`:g` ne conserva solo 6)."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def prometheus_text() -> str:
+    """
+    Esposizione in formato testo di Prometheus: un summary per fase (quantili sulle misure
+    recenti, _sum e _count cumulativi e quindi monotoni) e un counter per contatore.
+    """
+    data = summary()
+    lines = [
+        "# HELP scoreboard_monitor_stage_seconds Durata delle fasi della pipeline per tick.",
+        "# TYPE scoreboard_monitor_stage_seconds summary",
+    ]
+    for name, stats in sorted(data['stages'].items()):
+        for q in SUMMARY_QUANTILES:
+            lines.append(f'scoreboard_monitor_stage_seconds{{stage="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}')
+        lines.append(f'scoreboard_monitor_stage_seconds_sum{{stage="{name}"}} {stats["total"]:.6f}')
+        lines.append(f'scoreboard_monitor_stage_seconds_count{{stage="{name}"}} {stats["total_count"]}')
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f"# TYPE scoreboard_monitor_{name} counter")
+        lines.append(f"scoreboard_monitor_{name} {_format_counter(value)}")
+    return '\n'.join(lines) + '\n'
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
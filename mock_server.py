@@ -0,0 +1,299 @@
+# scoreboard_monitor/mock_server.py
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+from round_cache import RoundCache
+from synthetic import SyntheticGame
+from config import STATUS_ENDPOINT, SCOREBOARD_ENDPOINT, COLOR_YELLOW, COLOR_RESET
+
+# Prefisso delle rotte servite, come nell'API reale (BASE_URL termina con /api/)
+API_PREFIX = "/api/"
+# Numero di corpi di tabellone serializzati tenuti in memoria
+_BODY_CACHE_SIZE = 16
+
+class FaultProfile:
+    """Guasti e ritardi simulati, applicati a ogni richiesta in modo indipendente."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0,
+        drip_chunk_bytes: int = 0,
+        drip_interval: float = 0.0,
+        seed: int | None = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.drip_chunk_bytes = drip_chunk_bytes
+        self.drip_interval = drip_interval
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def delay(self) -> float:
+        """Latenza della richiesta: valore base più un jitter uniforme in [-jitter, +jitter]."""
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + (2 * self._random() - 1) * self.jitter)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self._random() < self.error_rate
+
+    def should_hang(self) -> bool:
+        return self.timeout_rate > 0 and self._random() < self.timeout_rate
+
+class GameClock:
+    """Orologio dei tick: il round avanza ogni `round_time` secondi a partire da `start`."""
+
+    def __init__(self, round_time: float, rounds: int, start_round: int = 0, publish_delay: float = 0.0):
+        self.round_time = round_time
+        self.rounds = rounds
+        # Ritardo (s) tra il cambio round e la pubblicazione del nuovo scoreboardRound
+        self.publish_delay = publish_delay
+        self.start = time.time() - start_round * round_time
+
+    def scoreboard_round(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        elapsed = now - self.start - self.publish_delay
+        return max(0, min(self.rounds, int(elapsed // self.round_time)))
+
+class SyntheticSource:
+    """Partita generata da synthetic.SyntheticGame, sincronizzata con l'orologio del server."""
+
+    def __init__(self, game: SyntheticGame):
+        self.game = game
+        self.rounds = game.rounds
+        self._lock = threading.Lock()
+
+    def status(self, scoreboard_round: int, clock: GameClock) -> dict:
+        self.game.start = datetime.fromtimestamp(int(clock.start), timezone.utc)
+        self.game.round_time = clock.round_time
+        return self.game.status(scoreboard_round)
+
+    def scoreboard_body(self, tick: int) -> bytes | None:
+        # Il tabellone restituito non viene più modificato dal generatore: la serializzazione
+        # può avvenire fuori dal lock
+        with self._lock:
+            data = self.game.scoreboard(tick)
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+class ReplaySource:
+    """
+    Partita registrata in una cartella di round_cache.RoundCache (es. `.round_cache/<partita>`):
+    i tabelloni vengono serviti così come erano stati ricevuti dall'API reale.
+    """
+
+    def __init__(self, directory: str, freeze_round: int | None = None):
+        self.cache = RoundCache(directory)
+        ticks = self.cache.ticks()
+        if not ticks:
+            raise ValueError(f"Nessun round registrato in {directory}")
+        self.first_tick = ticks[0]
+        self.rounds = ticks[-1]
+        self.freeze_round = freeze_round if freeze_round is not None else self.rounds
+
+    def status(self, scoreboard_round: int, clock: GameClock) -> dict:
+        start = datetime.fromtimestamp(int(clock.start), timezone.utc)
+        end = datetime.fromtimestamp(int(clock.start + self.rounds * clock.round_time), timezone.utc)
+        return {
+            'start': start.isoformat().replace('+00:00', 'Z'),
+            'end': end.isoformat().replace('+00:00', 'Z'),
+            'roundTime': clock.round_time,
+            'rounds': self.rounds,
+            'freezeRound': self.freeze_round,
+            'currentRound': min(scoreboard_round + 1, self.rounds),
+            'scoreboardRound': scoreboard_round,
+        }
+
+    def scoreboard_body(self, tick: int) -> bytes | None:
+        return self.cache.get_raw(tick)
+
+class MockGameServer(ThreadingHTTPServer):
+    """
+    Server HTTP locale che imita l'API del gameserver (`status` e `scoreboard/table/<tick>`)
+    con un orologio dei tick simulato e l'iniezione dei guasti descritti da FaultProfile.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, source, clock: GameClock, faults: FaultProfile | None = None, verbose: bool = False):
+        super().__init__(address, _MockRequestHandler)
+        self.source = source
+        self.clock = clock
+        self.faults = faults if faults is not None else FaultProfile()
+        self.verbose = verbose
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def scoreboard_body(self, tick: int) -> bytes | None:
+        with self._lock:
+            body = self._bodies.get(tick)
+            if body is not None:
+                self._bodies.move_to_end(tick)
+                return body
+        body = self.source.scoreboard_body(tick)
+        if body is not None:
+            with self._lock:
+                self._bodies[tick] = body
+                if len(self._bodies) > _BODY_CACHE_SIZE:
+                    self._bodies.popitem(last=False)
+        return body
+
+    def record(self, sent: int):
+        with self._lock:
+            self.request_count += 1
+            self.bytes_sent += sent
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    server: MockGameServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        faults = self.server.faults
+        time.sleep(faults.delay())
+        if faults.should_hang():
+            # Simula una richiesta che non riceve mai risposta entro il timeout del client
+            time.sleep(faults.timeout_seconds)
+            self.close_connection = True
+            return
+        if faults.should_fail():
+            self._send_json(503, {'error': 'Errore simulato'})
+            return
+
+        path = urlparse(self.path).path
+        if not path.startswith(API_PREFIX):
+            self._send_json(404, {'error': 'Not found'})
+            return
+        endpoint = path[len(API_PREFIX):]
+        scoreboard_round = self.server.clock.scoreboard_round()
+        if endpoint == STATUS_ENDPOINT:
+            self._send_json(200, self.server.source.status(scoreboard_round, self.server.clock))
+        elif endpoint.startswith(SCOREBOARD_ENDPOINT):
+            self._send_scoreboard(endpoint[len(SCOREBOARD_ENDPOINT):], scoreboard_round)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def _send_scoreboard(self, tick_text: str, scoreboard_round: int):
+        try:
+            tick = int(tick_text)
+        except ValueError:
+            self._send_json(400, {'error': 'Tick non valido'})
+            return
+        if tick < 0 or tick > scoreboard_round:
+            self._send_json(404, {'error': 'Tick non ancora disponibile'})
+            return
+        body = self.server.scoreboard_body(tick)
+        if body is None:
+            self._send_json(404, {'error': 'Tick non registrato'})
+            return
+        # I tabelloni dei tick conclusi non cambiano più: ETag stabile per tick
+        etag = f'"tick-{tick}-{len(body)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', {'ETag': etag})
+            return
+        self._send(200, body, {'ETag': etag, 'Last-Modified': formatdate(self.server.clock.start + tick * self.server.clock.round_time, usegmt=True)})
+
+    def _send_json(self, code: int, data: dict):
+        self._send(code, json.dumps(data).encode('utf-8'))
+
+    def _send(self, code: int, body: bytes, headers: dict | None = None):
+        self.send_response(code)
+        if code != 304:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        faults = self.server.faults
+        try:
+            if faults.drip_chunk_bytes > 0 and len(body) > faults.drip_chunk_bytes:
+                # Corpo inviato a gocce: blocchi piccoli distanziati nel tempo
+                for i in range(0, len(body), faults.drip_chunk_bytes):
+                    self.wfile.write(body[i:i + faults.drip_chunk_bytes])
+                    self.wfile.flush()
+                    time.sleep(faults.drip_interval)
+            else:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        self.server.record(len(body))
+
+def main():
+    parser = argparse.ArgumentParser(description="Gameserver locale simulato per provare il monitor senza una CTF in corso.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--round-time', type=float, default=10.0, help="Durata di un round in secondi")
+    parser.add_argument('--start-round', type=int, default=1, help="Round da cui parte l'orologio")
+    parser.add_argument('--replay', metavar='CARTELLA', help="Rigioca una partita registrata nella cache dei round")
+    parser.add_argument('--teams', type=int, default=40)
+    parser.add_argument('--services', type=int, default=6)
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--stdout-bytes', type=int, default=200, help="Dimensione dell'output dei checker falliti")
+    parser.add_argument('--failure-rate', type=float, default=0.1, help="Probabilità che un servizio sia giù in un round")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latenza di base delle risposte (s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Jitter uniforme sulla latenza (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Frazione di richieste che ricevono un 503")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Frazione di richieste che non ricevono risposta")
+    parser.add_argument('--timeout-seconds', type=float, default=30.0, help="Attesa delle richieste senza risposta (s)")
+    parser.add_argument('--drip-bytes', type=int, default=0, help="Invia i corpi a blocchi di questa dimensione")
+    parser.add_argument('--drip-interval', type=float, default=0.05, help="Pausa tra i blocchi inviati a gocce (s)")
+    parser.add_argument('--publish-delay', type=float, default=0.0, help="Ritardo di pubblicazione del nuovo round (s)")
+    parser.add_argument('--verbose', action='store_true', help="Stampa il log delle richieste")
+    args = parser.parse_args()
+
+    if args.replay:
+        source = ReplaySource(args.replay)
+    else:
+        source = SyntheticSource(SyntheticGame(
+            teams=args.teams, services=args.services, rounds=args.rounds,
+            stdout_bytes=args.stdout_bytes, failure_rate=args.failure_rate, seed=args.seed
+        ))
+    clock = GameClock(args.round_time, source.rounds, args.start_round, args.publish_delay)
+    faults = FaultProfile(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds, drip_chunk_bytes=args.drip_bytes, drip_interval=args.drip_interval,
+        seed=args.seed
+    )
+    server = MockGameServer((args.host, args.port), source, clock, faults, args.verbose)
+    print(f"{COLOR_YELLOW}Gameserver simulato in ascolto su {server.base_url}{COLOR_RESET}")
+    print(f"Avviare il monitor con SCOREBOARD_MONITOR_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nRichieste servite: {server.request_count}, byte inviati: {server.bytes_sent}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# scoreboard_monitor/resilience.py
+
+import time
+import random
+import threading
+
+from config import (
+    RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS
+)
+
+class Backoff:
+    """
+    Attese crescenti tra i tentativi: base * 2^tentativo fino a `max_delay`, con jitter (metà
+    fissa, metà casuale) così che più client non riprovino tutti nello stesso istante.
+    I primi tentativi restano rapidi: con la base predefinita il primo attende 0.1-0.2 s.
+    """
+
+    def __init__(self, base: float = RETRY_BASE_DELAY_SECONDS, max_delay: float = RETRY_MAX_DELAY_SECONDS, rng: random.Random | None = None):
+        self.base = base
+        self.max_delay = max_delay
+        self.attempt = 0
+        self._rng = rng if rng is not None else random.Random()
+
+    def next_delay(self) -> float:
+        ceiling = min(self.max_delay, self.base * (2 ** self.attempt))
+        self.attempt += 1
+        return ceiling / 2 + self._rng.uniform(0, ceiling / 2)
+
+    def reset(self):
+        self.attempt = 0
+
+class CircuitBreaker:
+    """
+    Interruttore per un'API non raggiungibile: dopo `failure_threshold` errori consecutivi si apre
+    e per `open_seconds` le richieste vengono rifiutate senza contattare il server. Trascorso
+    l'intervallo lascia passare una sola richiesta di prova (semiaperto): se riesce si richiude,
+    altrimenti si riapre.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True se la richiesta può essere inviata."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Registra un errore; True se in seguito a questo l'interruttore si è aperto."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Secondi mancanti alla prossima richiesta di prova (0 se l'interruttore non è aperto)."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
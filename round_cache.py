@@ -0,0 +1,139 @@
+# scoreboard_monitor/round_cache.py
+
+import os
+import json
+import zlib
+import hashlib
+import threading
+from typing import Dict, Any, Collection
+
+import json_stream
+from config import BASE_URL, ROUND_CACHE_DIR, ROUND_CACHE_MAX_BYTES
+
+DATA_FILENAME = "rounds.dat"
+INDEX_FILENAME = "rounds.idx"
+# Dopo una compattazione il file dati viene riportato a questa frazione della dimensione massima
+_COMPACT_TARGET_RATIO = 0.75
+
+class RoundCache:
+    """
+    Cache su disco delle risposte di `scoreboard/table/<tick>`.
+
+    I tabelloni vengono salvati compressi (zlib) in coda a un file dati append-only; un file
+    indice, anch'esso append-only, associa ad ogni tick l'offset e la lunghezza del record.
+    Quando il file dati supera la dimensione massima vengono scartati i tick più vecchi.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = ROUND_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._data_path = os.path.join(directory, DATA_FILENAME)
+        self._index_path = os.path.join(directory, INDEX_FILENAME)
+        self._index: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def for_game(cls, status_data: Dict[str, Any], root: str = ROUND_CACHE_DIR) -> "RoundCache":
+        """Apre la cache della partita identificata da URL dell'API e orario di inizio."""
+        game_id = f"{BASE_URL}|{status_data.get('start', '')}"
+        game_key = hashlib.sha1(game_id.encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(root, game_key))
+
+    def _load_index(self):
+        """Legge l'indice, ignorando le voci che puntano oltre la fine del file dati."""
+        data_size = os.path.getsize(self._data_path) if os.path.exists(self._data_path) else 0
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, 'r', encoding='utf-8') as index_file:
+            for line in index_file:
+                try:
+                    tick, offset, length = (int(x) for x in line.split())
+                except ValueError:
+                    continue
+                if offset + length <= data_size:
+                    self._index[tick] = (offset, length)
+
+    def __contains__(self, tick: int) -> bool:
+        return tick in self._index
+
+    def ticks(self) -> list:
+        """Elenco ordinato dei tick presenti in cache."""
+        return sorted(self._index)
+
+    def get_raw(self, tick: int) -> bytes | None:
+        """Restituisce il corpo JSON originale del tick indicato, o None se non è in cache."""
+        with self._lock:
+            entry = self._index.get(tick)
+            if entry is None:
+                return None
+            offset, length = entry
+            with open(self._data_path, 'rb') as data_file:
+                data_file.seek(offset)
+                blob = data_file.read(length)
+        try:
+            return zlib.decompress(blob)
+        except zlib.error:
+            return None
+
+    def get(self, tick: int, teams: Collection[str] | None = None) -> dict | None:
+        """
+        Restituisce il tabellone del tick indicato, o None se non è in cache.
+        Con `teams` vengono decodificati solo i team indicati.
+        """
+        body = self.get_raw(tick)
+        if body is None:
+            return None
+        try:
+            text = body.decode('utf-8')
+            return json_stream.parse_scoreboard(text, teams) if teams is not None else json.loads(text)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+
+    def put(self, tick: int, data: dict):
+        """Aggiunge il tabellone di un tick concluso; i tick già presenti non vengono riscritti."""
+        if tick not in self._index:
+            self.put_raw(tick, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def put_raw(self, tick: int, body: bytes):
+        """Aggiunge il corpo JSON originale di un tick concluso, così come ricevuto dall'API."""
+        if tick in self._index:
+            return
+        blob = zlib.compress(body)
+        with self._lock:
+            if tick in self._index:
+                return
+            with open(self._data_path, 'ab') as data_file:
+                offset = data_file.tell()
+                data_file.write(blob)
+            with open(self._index_path, 'a', encoding='utf-8') as index_file:
+                index_file.write(f"{tick} {offset} {len(blob)}\n")
+            self._index[tick] = (offset, len(blob))
+            if offset + len(blob) > self.max_bytes:
+                self._compact()
+
+    def _compact(self):
+        """Riscrive i file mantenendo i tick più recenti entro la dimensione obiettivo."""
+        target = int(self.max_bytes * _COMPACT_TARGET_RATIO)
+        kept, total = [], 0
+        for tick in sorted(self._index, reverse=True):
+            length = self._index[tick][1]
+            if total + length > target:
+                break
+            kept.append(tick)
+            total += length
+
+        new_index = {}
+        tmp_data_path, tmp_index_path = self._data_path + '.tmp', self._index_path + '.tmp'
+        with open(self._data_path, 'rb') as src, open(tmp_data_path, 'wb') as dst, \
+                open(tmp_index_path, 'w', encoding='utf-8') as index_file:
+            for tick in sorted(kept):
+                offset, length = self._index[tick]
+                src.seek(offset)
+                new_index[tick] = (dst.tell(), length)
+                dst.write(src.read(length))
+                index_file.write(f"{tick} {new_index[tick][0]} {length}\n")
+        os.replace(tmp_data_path, self._data_path)
+        os.replace(tmp_index_path, self._index_path)
+        self._index = new_index
@@ -0,0 +1,165 @@
+# scoreboard_monitor/synthetic.py
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+from config import TARGET_TEAM_SHORTNAME, DEFAULT_TICK_DURATION_SECONDS
+
+# Azioni dei checker generate per ogni servizio, nell'ordine in cui compaiono nell'API
+CHECK_ACTIONS = ('CHECK_SLA', 'PUT_FLAG', 'GET_FLAG')
+# Codici di uscita dei checker: 101 = OK, gli altri sono i fallimenti più comuni
+EXIT_OK, FAILURE_EXIT_CODES = 101, (102, 103, 104, 110)
+FLAG_POINTS = 10.0
+# Ogni quanti round viene salvata una copia dello stato, da cui ripartire per i round già generati
+SNAPSHOT_INTERVAL = 16
+
+class SyntheticGame:
+    """
+    Generatore deterministico di risposte realistiche di `/status` e `scoreboard/table/<tick>`.
+
+    I contatori (punteggi, flag rubate e perse, check) sono cumulativi e coerenti tra un round e
+    l'altro: ogni round viene derivato dal precedente con un generatore pseudo-casuale inizializzato
+    da `seed`, per cui la stessa configurazione produce sempre gli stessi tabelloni. Il primo team
+    è sempre TARGET_TEAM_SHORTNAME, così da poter essere monitorato senza modificare la configurazione.
+    """
+
+    def __init__(
+        self,
+        teams: int = 40,
+        services: int = 6,
+        rounds: int = 300,
+        checks: int = len(CHECK_ACTIONS),
+        stdout_bytes: int = 200,
+        failure_rate: float = 0.1,
+        attack_rate: float = 0.2,
+        round_time: int = DEFAULT_TICK_DURATION_SECONDS,
+        freeze_round: int | None = None,
+        start: datetime | None = None,
+        seed: int = 0
+    ):
+        self.team_count = teams
+        self.service_count = services
+        self.rounds = rounds
+        self.checks = max(1, min(checks, len(CHECK_ACTIONS)))
+        self.stdout_bytes = stdout_bytes
+        self.failure_rate = failure_rate
+        self.attack_rate = attack_rate
+        self.round_time = round_time
+        self.freeze_round = freeze_round if freeze_round is not None else max(1, rounds - rounds // 10)
+        self.start = start if start is not None else datetime.now(timezone.utc).replace(microsecond=0)
+        self.seed = seed
+
+        self.team_names = [TARGET_TEAM_SHORTNAME] + [f"team{i:03d}" for i in range(1, teams)]
+        self.service_names = [f"service{i:02d}" for i in range(services)]
+        self._reset()
+
+    def _reset(self):
+        self._round = 0
+        # Contatori cumulativi per (team, servizio): [attacker, victim, stolen, lost, successful, total]
+        self._counters = [[[0.0, 0.0, 0, 0, 0, 0] for _ in self.service_names] for _ in self.team_names]
+        self._checks: List[List[List[dict]]] = [[[] for _ in self.service_names] for _ in self.team_names]
+        self._snapshots = {0: self._snapshot()}
+
+    def _snapshot(self):
+        # Le liste dei check vengono sostituite (non modificate) a ogni round: basta copiarne i riferimenti
+        return [[row[:] for row in team] for team in self._counters], [team[:] for team in self._checks]
+
+    def _restore(self, round_number: int):
+        counters, checks = self._snapshots[round_number]
+        self._round = round_number
+        self._counters = [[row[:] for row in team] for team in counters]
+        self._checks = [team[:] for team in checks]
+
+    def _stdout(self, rng: random.Random, exit_code: int) -> str:
+        """Output del checker lungo circa `stdout_bytes` caratteri, su più righe come un traceback."""
+        if exit_code == EXIT_OK:
+            return "OK"
+        header = f"Checker failed with exit code {exit_code}\n"
+        line = f"  File \"checker.py\", line {rng.randint(10, 400)}, in check\n"
+        body = header + line * max(0, (self.stdout_bytes - len(header)) // len(line) + 1)
+        return body[:max(len(header), self.stdout_bytes)]
+
+    def _advance(self):
+        """Simula un round: check dei servizi e scambi di flag tra team."""
+        self._round += 1
+        rng = random.Random(f"{self.seed}:{self._round}")
+        team_count = len(self.team_names)
+        for t in range(team_count):
+            for s in range(self.service_count):
+                counters = self._counters[t][s]
+                service_down = rng.random() < self.failure_rate
+                checks = []
+                for action in CHECK_ACTIONS[:self.checks]:
+                    exit_code = rng.choice(FAILURE_EXIT_CODES) if service_down and rng.random() < 0.7 else EXIT_OK
+                    checks.append({'action': action, 'exitCode': exit_code, 'stdout': self._stdout(rng, exit_code)})
+                self._checks[t][s] = checks
+                counters[5] += 1
+                if all(check['exitCode'] == EXIT_OK for check in checks):
+                    counters[4] += 1
+                # Flag rubate a questo servizio da altri team
+                if team_count > 1 and rng.random() < self.attack_rate:
+                    attacker = rng.randrange(team_count - 1)
+                    attacker += attacker >= t
+                    stolen = rng.randint(1, 3)
+                    counters[1] -= stolen * FLAG_POINTS
+                    counters[3] += stolen
+                    self._counters[attacker][s][0] += stolen * FLAG_POINTS
+                    self._counters[attacker][s][2] += stolen
+
+    def _round_at(self, round_number: int):
+        """
+        Porta lo stato al round indicato ripartendo, se è più vicina dello stato corrente, dall'ultima
+        copia salvata non successiva: un round già generato costa al più SNAPSHOT_INTERVAL - 1 round.
+        """
+        # Le copie sono salvate per tutti i multipli di SNAPSHOT_INTERVAL fino al round più avanzato generato
+        base = min(round_number - round_number % SNAPSHOT_INTERVAL, (len(self._snapshots) - 1) * SNAPSHOT_INTERVAL)
+        if round_number < self._round or base > self._round:
+            self._restore(base)
+        while self._round < round_number:
+            self._advance()
+            if self._round % SNAPSHOT_INTERVAL == 0:
+                self._snapshots.setdefault(self._round, self._snapshot())
+
+    def status(self, scoreboard_round: int) -> Dict[str, Any]:
+        """Risposta di `/status` con `scoreboardRound` pari al round indicato."""
+        end = self.start + timedelta(seconds=self.rounds * self.round_time)
+        return {
+            'start': self.start.isoformat().replace('+00:00', 'Z'),
+            'end': end.isoformat().replace('+00:00', 'Z'),
+            'roundTime': self.round_time,
+            'rounds': self.rounds,
+            'freezeRound': self.freeze_round,
+            'currentRound': min(scoreboard_round + 1, self.rounds),
+            'scoreboardRound': scoreboard_round,
+        }
+
+    def scoreboard(self, round_number: int) -> Dict[str, Any]:
+        """Risposta di `scoreboard/table/<tick>` per il round indicato."""
+        self._round_at(round_number)
+        teams = []
+        for t, shortname in enumerate(self.team_names):
+            services, total_score = [], 0.0
+            for s, s_name in enumerate(self.service_names):
+                attacker, victim, stolen, lost, successful, total = self._counters[t][s]
+                score = max(0.0, 1000.0 + attacker + victim)
+                total_score += score * (successful / total if total else 1.0)
+                services.append({
+                    'shortname': s_name,
+                    'score': score,
+                    'attackerScore': attacker,
+                    'victimScore': victim,
+                    'stolen': stolen,
+                    'lost': lost,
+                    'successfulChecks': successful,
+                    'totalChecks': total,
+                    'checks': self._checks[t][s],
+                })
+            teams.append({'name': f"Team {shortname}", 'shortname': shortname, 'score': total_score, 'services': services})
+        teams.sort(key=lambda team: -team['score'])
+        for position, team in enumerate(teams, start=1):
+            team['position'] = position
+        return {
+            'services': [{'shortname': s_name, 'name': s_name.capitalize()} for s_name in self.service_names],
+            'scoreboard': teams,
+        }
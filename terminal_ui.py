@@ -1,31 +1,87 @@
 # scoreboard_monitor/terminal_ui.py
 
-import os
+import sys
 import shutil
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Any, List
 from datetime import datetime, timezone
-from wcwidth import wcswidth
+from wcwidth import wcswidth, wcwidth
 
 from config import (
     COLOR_GREEN, COLOR_RED, COLOR_YELLOW, COLOR_CYAN, COLOR_MAGENTA,
-    COLOR_BOLD, COLOR_RESET
+    COLOR_BOLD, COLOR_RESET, RENDER_CACHE_SIZE
 )
 
+_ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;]*m')
+SEPARATOR_STR, MIN_COL_WIDTH = " │ ", 32
+
 # --- Funzioni Helper per la UI ---
 
 def get_terminal_width() -> int:
     return shutil.get_terminal_size().columns
 
-def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+class FrameRenderer:
+    """
+    Renderer a doppio buffer: il frame viene costruito in memoria come lista di righe e confrontato
+    con quello precedente, riscrivendo con sequenze di posizionamento del cursore solo le righe
+    cambiate, in un'unica scrittura. Il ridisegno completo avviene al primo frame, al cambio di
+    dimensione del terminale e quando il frame non entra nello schermo (righe più lunghe della
+    larghezza o più righe dell'altezza): in quel caso il frame viene scritto per intero e il
+    terminale scorre, come con print(), così nessuna riga (es. i riquadri in fondo) va persa.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self._previous: List[str] | None = None
+        self._size = None
+
+    def invalidate(self):
+        """Forza un ridisegno completo al prossimo frame."""
+        self._previous = None
+
+    def render(self, lines: List[str]):
+        size = shutil.get_terminal_size()
+        # Una riga resta libera per il cursore sotto il frame
+        fits = len(lines) < size.lines and all(visible_len(line) <= size.columns for line in lines)
+        out = ['\x1b[?25l']
+        if not fits or self._previous is None or size != self._size:
+            out.append('\x1b[H\x1b[2J')
+            out.append(''.join(f"{line}\x1b[K\n" for line in lines))
+        else:
+            previous = self._previous
+            for row, line in enumerate(lines):
+                if row >= len(previous) or previous[row] != line:
+                    out.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+            # Il cursore resta sotto il frame, ripulendo le righe rimaste dal frame precedente
+            out.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        out.append('\x1b[?25h')
+        self.stream.write(''.join(out))
+        self.stream.flush()
+        # Dopo lo scorrimento le righe sullo schermo non corrispondono più al frame: il prossimo
+        # frame verrà ridisegnato per intero
+        self._previous = lines if fits else None
+        self._size = size
+
+_renderer = FrameRenderer()
+
+def _emit(frame: List[str], text: str = ""):
+    """Aggiunge al frame il testo indicato, come lo avrebbe stampato print()."""
+    frame.extend(text.split('\n'))
+
+def invalidate_screen():
+    """Forza un ridisegno completo al prossimo frame (es. dopo messaggi stampati fuori dal renderer)."""
+    _renderer.invalidate()
 
 def play_alert_sound():
     print('\a', end='', flush=True)
 
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
 def visible_len(text: str) -> int:
-    return wcswidth(re.sub(r'\x1b\[[0-9;]*m', '', text))
+    return wcswidth(_ANSI_ESCAPE_RE.sub('', text))
 
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
 def pad_str(text: str, width: int, align: str = 'left') -> str:
     v_len = visible_len(text)
     padding_needed = max(0, width - v_len)
@@ -36,6 +92,7 @@ def pad_str(text: str, width: int, align: str = 'left') -> str:
         return left_pad + text + right_pad
     else: return text + (' ' * padding_needed)
 
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
 def _create_aligned_cell(left: str, right: str, width: int) -> str:
     len_left, len_right = visible_len(left), visible_len(right)
     padding = ' ' * max(1, width - len_left - len_right)
@@ -62,35 +119,140 @@ def _get_check_letters(checks: List[Dict]) -> str:
         output.append(f"{color}{check['action']}{COLOR_RESET}")
     return ' '.join(output)
 
-def _display_alerts_box(failing_services: Dict[str, str], width: int):
+def _truncate(text: str, width: int) -> str:
+    """Tronca testo senza sequenze di escape a `width` colonne, segnalando il taglio con '…'."""
+    if wcswidth(text) <= width:
+        return text
+    used, end = 0, 0
+    for end, char in enumerate(text):
+        used += max(0, wcwidth(char))
+        if used > width - 1:
+            break
+    return text[:end] + '…'
+
+def _display_alerts_box(frame: List[str], failing_services: Dict[str, str], width: int):
     title = " AVVISI DI STATO "
     padding = (width - len(title) - 2) // 2
     top_border = f"╭{'─' * padding}{COLOR_BOLD}{title}{COLOR_RESET}{COLOR_YELLOW}{'─' * (width - len(title) - padding - 2)}╮"
     bottom_border = '╰' + '─' * (width - 2) + '╯'
-    print(f"\n{COLOR_YELLOW}{top_border}{COLOR_RESET}")
+    _emit(frame, f"\n{COLOR_YELLOW}{top_border}{COLOR_RESET}")
     for service, reason in failing_services.items():
+        # Una riga per servizio: i messaggi lunghi (es. traceback) non spostano il resto della schermata
+        reason = _truncate(reason, width - visible_len(service) - 8)
         content = f"  • {COLOR_RED}{service}{COLOR_RESET}: {reason}"
         line = f"│{pad_str(content, width - 2)}{COLOR_YELLOW}│"
-        print(f"{COLOR_YELLOW}{line}{COLOR_RESET}")
-    print(f"{COLOR_YELLOW}{bottom_border}{COLOR_RESET}")
+        _emit(frame, f"{COLOR_YELLOW}{line}{COLOR_RESET}")
+    _emit(frame, f"{COLOR_YELLOW}{bottom_border}{COLOR_RESET}")
 
-def _display_strategic_advice_box(advice: Dict[str, str], width: int):
+def _display_strategic_advice_box(frame: List[str], advice: Dict[str, str], width: int):
     """Disegna un riquadro per i consigli strategici."""
     if not advice: return
     title = " CONSIGLI STRATEGICI "
     padding = (width - len(title) - 2) // 2
     top_border = f"╭{'─' * padding}{COLOR_BOLD}{title}{COLOR_RESET}{COLOR_MAGENTA}{'─' * (width - len(title) - padding - 2)}╮"
     bottom_border = '╰' + '─' * (width - 2) + '╯'
-    print(f"\n{COLOR_MAGENTA}{top_border}{COLOR_RESET}")
+    _emit(frame, f"\n{COLOR_MAGENTA}{top_border}{COLOR_RESET}")
     for service, message in advice.items():
         content = f"  • {COLOR_YELLOW}{service}{COLOR_RESET}: {message}"
         line = f"│{pad_str(content, width - 2)}{COLOR_MAGENTA}│"
-        print(f"{COLOR_MAGENTA}{line}{COLOR_RESET}")
-    print(f"{COLOR_MAGENTA}{bottom_border}{COLOR_RESET}")
+        _emit(frame, f"{COLOR_MAGENTA}{line}{COLOR_RESET}")
+    _emit(frame, f"{COLOR_MAGENTA}{bottom_border}{COLOR_RESET}")
+
+def _format_ranking(entries: list, color: str) -> str:
+    if not entries: return "-"
+    return ', '.join(f"{color}{team}{COLOR_RESET} {value}{f' (+{delta})' if delta else ''}" for team, value, delta in entries)
+
+def _display_analytics_box(frame: List[str], analytics: Dict[str, Any], width: int):
+    """Disegna il pannello di analisi dell'intero tabellone: attaccanti, vittime e first blood per servizio."""
+    if not analytics or not analytics.get('services'): return
+    title = f" ANALISI TABELLONE (round {analytics['round']}) "
+    padding = (width - len(title) - 2) // 2
+    top_border = f"╭{'─' * padding}{COLOR_BOLD}{title}{COLOR_RESET}{COLOR_CYAN}{'─' * (width - len(title) - padding - 2)}╮"
+    bottom_border = '╰' + '─' * (width - 2) + '╯'
+    _emit(frame, f"\n{COLOR_CYAN}{top_border}{COLOR_RESET}")
+    lines = []
+    for service, data in analytics['services'].items():
+        first_blood = data['first_blood']
+        first_blood_str = f" | First blood: {COLOR_MAGENTA}{first_blood[0]}{COLOR_RESET} (round {first_blood[1]})" if first_blood else ""
+        recent = data.get('recent_attackers')
+        recent_str = ""
+        if recent and analytics.get('window'):
+            recent_str = f" | Ultimi {analytics['window']} round: " + ', '.join(
+                f"{COLOR_GREEN}{team}{COLOR_RESET} {points:+.0f}" for team, points in recent
+            )
+        lines.append(
+            f"  • {COLOR_YELLOW}{service}{COLOR_RESET}: Attacco: {_format_ranking(data['attackers'], COLOR_GREEN)}"
+            f" | Vittime: {_format_ranking(data['victims'], COLOR_RED)}{first_blood_str}{recent_str}"
+        )
+    if analytics.get('movers'):
+        movers = ', '.join(
+            f"{team} {COLOR_GREEN + '↑' if delta > 0 else COLOR_RED + '↓'}{abs(delta)}{COLOR_RESET} ({position}°)"
+            for team, delta, position in analytics['movers']
+        )
+        lines.append(f"  • Posizioni: {movers}")
+    for content in lines:
+        _emit(frame, f"{COLOR_CYAN}│{pad_str(content, width - 2)}{COLOR_CYAN}│{COLOR_RESET}")
+    _emit(frame, f"{COLOR_CYAN}{bottom_border}{COLOR_RESET}")
+
+# --- Layout e Cache delle Colonne dei Servizi ---
+
+@lru_cache(maxsize=16)
+def _column_layout(term_width: int, service_names: tuple) -> tuple:
+    """Numero di colonne per riga e larghezza di colonna, ricalcolati solo se cambiano larghezza o servizi."""
+    num_services = len(service_names)
+    cols_per_row = max(1, min((term_width + len(SEPARATOR_STR)) // (MIN_COL_WIDTH + len(SEPARATOR_STR)), num_services))
+    col_width = (term_width - (cols_per_row - 1) * len(SEPARATOR_STR)) // cols_per_row
+    return cols_per_row, col_width
+
+# Blocchi di righe già renderizzati per servizio: (nome, larghezza, valori) -> righe
+_column_cache: "OrderedDict[tuple, List[str]]" = OrderedDict()
+
+def _service_column_key(s_name: str, s_data: Dict[str, Any], col_width: int) -> tuple:
+    return (
+        s_name, col_width,
+        s_data['sla_adjusted_score'], s_data['sla_adjusted_score_delta'],
+        s_data['score'], s_data['score_delta'],
+        s_data['attack_score'], s_data['attack_flag'], s_data['attack_score_delta'], s_data['attack_flag_delta'],
+        s_data['defense_score'], s_data['defense_flag'], s_data['defense_score_delta'], s_data['defense_flag_delta'],
+        s_data['sla'], s_data['sla_delta'],
+        tuple((check['action'], check['ok']) for check in s_data['checks'])
+    )
+
+def _render_service_column(s_name: str, s_data: Dict[str, Any], col_width: int) -> List[str]:
+    """Righe della colonna di un servizio; riusate finché i suoi dati non cambiano."""
+    key = _service_column_key(s_name, s_data, col_width)
+    cached = _column_cache.get(key)
+    if cached is not None:
+        _column_cache.move_to_end(key)
+        return cached
+
+    column = []
+    sla_adjusted_score = f"🏆 {COLOR_RESET}{s_data['sla_adjusted_score']:.2f} ({_format_score_delta(s_data['sla_adjusted_score_delta'])})"
+    column.append(pad_str(sla_adjusted_score, col_width, 'center'))
+    column.append(pad_str(f"{COLOR_BOLD}{s_name}{COLOR_RESET}", col_width, 'center'))
+    
+    left_score = f"⭐ {COLOR_RESET}{s_data['score']:.2f}"; right_score = _format_score_delta(s_data['score_delta'])
+    left_attack = f"⚔️ {COLOR_RESET}{s_data['attack_score']:+.2f} ({s_data['attack_flag']})"; right_attack = f"{_format_score_delta(s_data['attack_score_delta'])}{_format_flag_delta(s_data['attack_flag_delta'])}"
+    left_defense = f"🛡️ {COLOR_RESET}{s_data['defense_score']:+.2f} ({s_data['defense_flag']})"; right_defense = f"{_format_score_delta(s_data['defense_score_delta'])}{_format_flag_delta(s_data['defense_flag_delta'])}"
+    left_sla = f"🌐 {COLOR_RESET}{s_data['sla']:.2f}%"; right_sla = _format_score_delta(s_data['sla_delta'], with_arrow=True)
+    
+    column.append(_create_aligned_cell(left_score, right_score, col_width))
+    column.append(_create_aligned_cell(left_attack, right_attack, col_width))
+    column.append(_create_aligned_cell(left_defense, right_defense, col_width))
+    column.append(_create_aligned_cell(left_sla, right_sla, col_width))
+
+    checks = f"🔧 [{_get_check_letters(s_data['checks'])}]"
+    column.append(pad_str(checks, col_width, 'center'))
+    column.append(' ' * col_width)
+
+    _column_cache[key] = column
+    if len(_column_cache) > RENDER_CACHE_SIZE:
+        _column_cache.popitem(last=False)
+    return column
 
 # --- Funzioni di Rendering Principali ---
 
-def _display_game_status_header(status_data: Dict[str, Any]):
+def _display_game_status_header(frame: List[str], status_data: Dict[str, Any]):
     now = datetime.now(timezone.utc)
     start_time = datetime.fromisoformat(status_data['start'].replace('Z', '+00:00'))
     end_time = datetime.fromisoformat(status_data['end'].replace('Z', '+00:00'))
@@ -108,67 +270,77 @@ def _display_game_status_header(status_data: Dict[str, Any]):
     progress_bar_width = max(10, width - len(static_text))
     filled_width = int(progress * progress_bar_width)
     bar = '█' * filled_width + '─' * (progress_bar_width - filled_width)
-    print(f"Progresso Gara: [{bar}] {progress:.1%} ({time_rem_str})")
+    _emit(frame, f"Progresso Gara: [{bar}] {progress:.1%} ({time_rem_str})")
     current_round, total_rounds, freeze_round = status_data.get('currentRound', 'N/A'), status_data.get('rounds', 'N/A'), status_data.get('freezeRound', 'N/A')
-    print(f"Round: {COLOR_BOLD}{current_round}/{total_rounds}{COLOR_RESET} | Freeze al round: {COLOR_YELLOW}{freeze_round}{COLOR_RESET}")
+    _emit(frame, f"Round: {COLOR_BOLD}{current_round}/{total_rounds}{COLOR_RESET} | Freeze al round: {COLOR_YELLOW}{freeze_round}{COLOR_RESET}")
     if current_round is not None and current_round >= freeze_round:
         freeze_msg = f"{COLOR_YELLOW}!!! PUNTEGGIO CONGELATO !!!{COLOR_RESET}"
-        print(f"\n{freeze_msg:^{width}}\n")
+        _emit(frame, f"\n{freeze_msg:^{width}}\n")
 
-def display_scoreboard(team_data: Dict[str, Any], status_data: Dict[str, Any], shutdown_advice: Dict[str, str] = None):
-    clear_screen()
-    if not team_data or not status_data: return
-    _display_game_status_header(status_data)
+def _display_stale_banner(frame: List[str], stale_since: float, width: int):
+    last_update = datetime.fromtimestamp(stale_since).strftime('%H:%M:%S')
+    stale_msg = f"{COLOR_YELLOW}!!! DATI NON AGGIORNATI (ultimo aggiornamento alle {last_update}) - nuovo tentativo in corso !!!{COLOR_RESET}"
+    _emit(frame, f"{stale_msg:^{width}}")
+
+def build_scoreboard_frame(
+    team_data: Dict[str, Any],
+    status_data: Dict[str, Any],
+    shutdown_advice: Dict[str, str] = None,
+    stale_since: float | None = None,
+    analytics: Dict[str, Any] | None = None
+) -> List[str]:
+    """
+    Costruisce in memoria le righe della schermata del team monitorato.
+    Con `stale_since` (istante dell'ultimo aggiornamento riuscito) i dati vengono segnalati come non aggiornati;
+    con `analytics` (analytics.ScoreboardAnalytics.summary) viene aggiunto il pannello di analisi del tabellone.
+    """
+    frame = []
+    if not team_data or not status_data: return frame
+    _display_game_status_header(frame, status_data)
+    if stale_since is not None:
+        _display_stale_banner(frame, stale_since, get_terminal_width())
     score_str = f"{team_data['score']:,.2f}"
     name_str = f"{team_data['name']} ({team_data['shortname']})"
-    print(f"{COLOR_BOLD}{COLOR_CYAN}Monitor Team: {name_str}{COLOR_RESET}")
-    print(f"Posizione: {COLOR_BOLD}{team_data['position']}{COLOR_RESET} | Punteggio Totale: {COLOR_BOLD}{score_str}{COLOR_RESET} ({_format_score_delta(team_data['score_delta'], with_arrow=True)})\n\n")
+    _emit(frame, f"{COLOR_BOLD}{COLOR_CYAN}Monitor Team: {name_str}{COLOR_RESET}")
+    _emit(frame, f"Posizione: {COLOR_BOLD}{team_data['position']}{COLOR_RESET} | Punteggio Totale: {COLOR_BOLD}{score_str}{COLOR_RESET} ({_format_score_delta(team_data['score_delta'], with_arrow=True)})\n\n")
     services = team_data.get('services', {})
-    if not services: return
+    if not services: return frame
     
     term_width, num_services = get_terminal_width(), len(services)
-    separator_str, MIN_COL_WIDTH = " │ ", 32
     if term_width < MIN_COL_WIDTH:
-        print(f"{COLOR_YELLOW}Finestra del terminale troppo stretta per visualizzare i servizi.{COLOR_RESET}")
-        return
-    cols_per_row = max(1, min((term_width + len(separator_str)) // (MIN_COL_WIDTH + len(separator_str)), num_services))
-    col_width = (term_width - (cols_per_row - 1) * len(separator_str)) // cols_per_row
+        _emit(frame, f"{COLOR_YELLOW}Finestra del terminale troppo stretta per visualizzare i servizi.{COLOR_RESET}")
+        return frame
+    cols_per_row, col_width = _column_layout(term_width, tuple(services))
     service_items = list(services.items())
     
     for i in range(0, num_services, cols_per_row):
         chunk_items = service_items[i:i + cols_per_row]
         num_cols_in_chunk = len(chunk_items)
-        columns = [[] for _ in range(num_cols_in_chunk)]
-
-        for j, (s_name, s_data) in enumerate(chunk_items):
-            sla_adjusted_score = f"🏆 {COLOR_RESET}{s_data['sla_adjusted_score']:.2f} ({_format_score_delta(s_data['sla_adjusted_score_delta'])})"
-            columns[j].append(pad_str(sla_adjusted_score, col_width, 'center'))
-            columns[j].append(pad_str(f"{COLOR_BOLD}{s_name}{COLOR_RESET}", col_width, 'center'))
-            
-            left_score = f"⭐ {COLOR_RESET}{s_data['score']:.2f}"; right_score = _format_score_delta(s_data['score_delta'])
-            left_attack = f"⚔️ {COLOR_RESET}{s_data['attack_score']:+.2f} ({s_data['attack_flag']})"; right_attack = f"{_format_score_delta(s_data['attack_score_delta'])}{_format_flag_delta(s_data['attack_flag_delta'])}"
-            left_defense = f"🛡️ {COLOR_RESET}{s_data['defense_score']:+.2f} ({s_data['defense_flag']})"; right_defense = f"{_format_score_delta(s_data['defense_score_delta'])}{_format_flag_delta(s_data['defense_flag_delta'])}"
-            left_sla = f"🌐 {COLOR_RESET}{s_data['sla']:.2f}%"; right_sla = _format_score_delta(s_data['sla_delta'], with_arrow=True)
-            
-            columns[j].append(_create_aligned_cell(left_score, right_score, col_width))
-            columns[j].append(_create_aligned_cell(left_attack, right_attack, col_width))
-            columns[j].append(_create_aligned_cell(left_defense, right_defense, col_width))
-            columns[j].append(_create_aligned_cell(left_sla, right_sla, col_width))
-
-            checks = f"🔧 [{_get_check_letters(s_data['checks'])}]"
-            columns[j].append(pad_str(checks, col_width, 'center'))
-            columns[j].append(' ' * col_width)
+        columns = [_render_service_column(s_name, s_data, col_width) for s_name, s_data in chunk_items]
 
         num_rows = len(columns[0]) if columns else 0
         for r in range(num_rows):
-            if r == 2: print(separator_str.join(['─' * col_width] * num_cols_in_chunk))
-            print(separator_str.join([columns[c][r] for c in range(num_cols_in_chunk)]))
+            if r == 2: _emit(frame, SEPARATOR_STR.join(['─' * col_width] * num_cols_in_chunk))
+            _emit(frame, SEPARATOR_STR.join([columns[c][r] for c in range(num_cols_in_chunk)]))
 
         if i + cols_per_row < num_services:
-            print(f"\n{COLOR_MAGENTA}{'═' * term_width}{COLOR_RESET}\n")
+            _emit(frame, f"\n{COLOR_MAGENTA}{'═' * term_width}{COLOR_RESET}\n")
 
     # Footer
+    if analytics:
+        _display_analytics_box(frame, analytics, term_width)
     if shutdown_advice:
-        _display_strategic_advice_box(shutdown_advice, term_width)
+        _display_strategic_advice_box(frame, shutdown_advice, term_width)
     if team_data['failing_services']:
-        _display_alerts_box(team_data['failing_services'], term_width)
\ No newline at end of file
+        _display_alerts_box(frame, team_data['failing_services'], term_width)
+    return frame
+
+def display_scoreboard(
+    team_data: Dict[str, Any],
+    status_data: Dict[str, Any],
+    shutdown_advice: Dict[str, str] = None,
+    stale_since: float | None = None,
+    analytics: Dict[str, Any] | None = None
+):
+    if not team_data or not status_data: return
+    _renderer.render(build_scoreboard_frame(team_data, status_data, shutdown_advice, stale_since, analytics))
\ No newline at end of file
@@ -0,0 +1,7 @@
+# scoreboard_monitor/tests/conftest.py
+
+import os
+import sys
+
+# I moduli del monitor sono file singoli nella cartella principale, importati senza pacchetto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+# scoreboard_monitor/tests/test_columnar.py
+
+import numpy as np
+import pytest
+
+import columnar
+from analytics import ScoreboardAnalytics
+from history_store import GameHistory
+from synthetic import SyntheticGame
+
+ROUNDS = 14
+WINDOW = 5
+
+@pytest.fixture(scope='module')
+def history() -> GameHistory:
+    game = SyntheticGame(teams=8, services=3, rounds=ROUNDS, failure_rate=0.3, attack_rate=0.5, seed=11)
+    history = GameHistory()
+    for round_number in range(1, ROUNDS + 1):
+        history.add_round(round_number, game.scoreboard(round_number))
+    return history
+
+def test_window_deltas_match_summed_round_deltas(history):
+    stack = history.round_range(1, ROUNDS + 1)
+    window = columnar.compute_window_metrics(stack, WINDOW)
+    assert window['score_delta'].shape == (ROUNDS - WINDOW,) + stack.shape[2:]
+    for i in range(ROUNDS - WINDOW):
+        rounds = range(i + 2, i + 2 + WINDOW)
+        for name in ('score_delta', 'attack_score_delta', 'defense_score_delta'):
+            expected = sum(history.metrics(r)[name] for r in rounds)
+            np.testing.assert_allclose(window[name][i], expected)
+
+def test_window_sla_counts_only_checks_in_window(history):
+    window = history.window_metrics(ROUNDS, WINDOW)
+    first, last = history.table(ROUNDS - WINDOW), history.table(ROUNDS)
+    successful = columnar.FIELD_INDEX['successfulChecks']
+    total = columnar.FIELD_INDEX['totalChecks']
+    for t in range(len(history.team_names)):
+        for s in range(len(history.service_names)):
+            checks = last[total, t, s] - first[total, t, s]
+            ok = last[successful, t, s] - first[successful, t, s]
+            assert window['sla'][t, s] == pytest.approx(100 * ok / checks if checks else 0.0)
+
+def test_window_metrics_needs_both_ends(history):
+    assert history.window_metrics(WINDOW, WINDOW) is None  # round 0 non è nello storico
+    assert history.window_metrics(ROUNDS + 1, WINDOW) is None
+    assert columnar.compute_window_metrics(history.round_range(1, 4), WINDOW)['sla'].shape[0] == 0
+
+def test_analytics_reports_recent_attackers(history):
+    analytics = ScoreboardAnalytics(top_k=3, window=WINDOW)
+    for round_number in range(1, ROUNDS + 1):
+        analytics.update(history, round_number)
+    summary = analytics.summary()
+    assert summary['window'] == WINDOW
+    gained = history.window_metrics(ROUNDS, WINDOW)['attack_score_delta']
+    for s, s_name in enumerate(history.service_names):
+        recent = summary['services'][s_name]['recent_attackers']
+        points = [value for _, value in recent]
+        assert points == sorted(points, reverse=True)
+        assert points == sorted(gained[:, s][gained[:, s] > 0], reverse=True)[:3]
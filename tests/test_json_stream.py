@@ -0,0 +1,64 @@
+# scoreboard_monitor/tests/test_json_stream.py
+
+import json
+
+import pytest
+
+import json_stream
+from synthetic import SyntheticGame
+
+def _chunks(text: str, size: int) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def _expected(data: dict, teams) -> dict:
+    expected = dict(data)
+    expected['scoreboard'] = [team for team in data['scoreboard'] if teams is None or team['shortname'] in teams]
+    return expected
+
+@pytest.fixture(scope='module')
+def scoreboard() -> dict:
+    game = SyntheticGame(teams=12, services=4, rounds=5, failure_rate=0.4, stdout_bytes=600, seed=7)
+    return game.scoreboard(4)
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64, 1000, 10 ** 9])
+def test_matches_json_loads_for_any_chunking(scoreboard, chunk_size):
+    body = json.dumps(scoreboard)
+    teams = {scoreboard['scoreboard'][3]['shortname'], scoreboard['scoreboard'][-1]['shortname']}
+    assert json_stream.parse_scoreboard(_chunks(body, chunk_size), teams) == _expected(scoreboard, teams)
+
+def test_all_teams_and_pretty_printed_body(scoreboard):
+    body = json.dumps(scoreboard, indent=2, ensure_ascii=False)
+    assert json_stream.parse_scoreboard(_chunks(body, 17)) == scoreboard
+
+def test_strings_with_structural_characters_and_escapes():
+    tricky = 'exit 1: {"a": [1, 2]}, "}]" \\ \\" ,{ è \U0001f6a9'
+    data = {
+        'scoreboard': [
+            {'name': tricky, 'shortname': 'other', 'services': [{'checks': [{'stdout': tricky * 3}]}]},
+            {'shortname': 'wanted', 'name': 'x},{"shortname": "other"', 'score': 1.5e3},
+        ],
+        'services': [{'shortname': '[s]'}],
+    }
+    body = json.dumps(data)
+    for size in (1, 5, len(body)):
+        assert json_stream.parse_scoreboard(_chunks(body, size), ('wanted',)) == _expected(data, ('wanted',))
+
+def test_top_level_number_split_across_chunks():
+    body = '{"round": 12345, "scoreboard": [{"shortname": "a", "score": 678}], "teams": 2}'
+    parser = json_stream.SelectiveScoreboardParser(('a',))
+    for chunk in ('{"round": 12', '345, "scoreboard": [{"shortname": "a", "score": 6', '78}], "teams": 2', '}'):
+        parser.feed(chunk)
+    assert parser.close() == json.loads(body)
+
+def test_team_fields_keeps_shortname(scoreboard):
+    result = json_stream.parse_scoreboard(json.dumps(scoreboard), None, ('score',))
+    assert result['scoreboard'] == [{'shortname': t['shortname'], 'score': t['score']} for t in scoreboard['scoreboard']]
+
+def test_empty_scoreboard_and_key_order():
+    assert json_stream.parse_scoreboard('{"scoreboard": [], "services": []}', ('a',)) == {'scoreboard': [], 'services': []}
+    assert json_stream.parse_scoreboard('{ "services" : [ ] , "scoreboard" : [ ] }') == {'services': [], 'scoreboard': []}
+
+@pytest.mark.parametrize('body', ['', '{"scoreboard": [{"shortname": "a"}', '{"scoreboard": [{"shortname": "a"}] "x": 1}', '[]', '{"a": tru}'])
+def test_invalid_or_truncated_body_raises(body):
+    with pytest.raises(json.JSONDecodeError):
+        json_stream.parse_scoreboard(_chunks(body, 4) or [''])
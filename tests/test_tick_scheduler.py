@@ -0,0 +1,81 @@
+# scoreboard_monitor/tests/test_tick_scheduler.py
+
+from datetime import datetime, timezone
+
+import pytest
+
+import tick_scheduler
+from tick_scheduler import TickScheduler
+
+ROUND_TIME = 120.0
+START = 1_700_000_000.0
+FETCH_LATENCY = 0.010
+LOOP_OVERHEAD = 0.002
+
+class SimulatedGame:
+    """Gameserver con orologio simulato: il round cambia `offset` secondi dopo il cambio nominale."""
+
+    def __init__(self, offset: float):
+        self.now = START + 5 * ROUND_TIME + 30
+        self.offset = offset
+        self.polls = 0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds + LOOP_OVERHEAD
+
+    def scoreboard_round(self, at: float) -> int:
+        return int((at - START - self.offset) // ROUND_TIME)
+
+    def fetch_status(self) -> dict:
+        self.polls += 1
+        self.now += FETCH_LATENCY / 2
+        scoreboard_round = self.scoreboard_round(self.now)
+        self.now += FETCH_LATENCY / 2
+        start = datetime.fromtimestamp(START, timezone.utc).isoformat().replace('+00:00', 'Z')
+        return {'start': start, 'roundTime': ROUND_TIME, 'scoreboardRound': scoreboard_round}
+
+@pytest.mark.parametrize('offset', [1.7, 20.0, -11.0])
+def test_rollover_detected_quickly_with_fetch_latency(monkeypatch, offset):
+    game = SimulatedGame(offset)
+    monkeypatch.setattr(tick_scheduler.time, 'time', game.time)
+    scheduler = TickScheduler()
+    status = game.fetch_status()
+    scheduler.observe(status)
+
+    lags, polls = [], []
+    for target in range(status['scoreboardRound'] + 1, status['scoreboardRound'] + 8):
+        game.polls = 0
+        scheduler.wait_for_round(target, game.fetch_status, game.sleep)
+        lags.append(game.now - (START + target * ROUND_TIME + offset))
+        polls.append(game.polls)
+
+    assert scheduler.offset == pytest.approx(offset, abs=scheduler.dense_interval)
+    # A regime: pochi poll per tick e rilevamento entro un intervallo di poll fitti
+    assert max(polls[-3:]) <= 10
+    assert max(lags[-3:]) <= scheduler.dense_interval + FETCH_LATENCY + 2 * LOOP_OVERHEAD
+
+def test_unknown_start_polls_at_fixed_rate():
+    scheduler = TickScheduler()
+    scheduler.observe({'scoreboardRound': 3}, observed_at=START)
+    assert scheduler.predicted_rollover(4) is None
+    assert scheduler.next_poll_delay(4, now=START) == scheduler.max_interval
+
+def test_long_gap_on_short_rounds_is_not_a_measurement():
+    scheduler = TickScheduler()
+    start = datetime.fromtimestamp(START, timezone.utc).isoformat().replace('+00:00', 'Z')
+    # Round di 4 s: due poll a 4 s di distanza non dicono quando è avvenuto il cambio
+    scheduler.observe({'start': start, 'roundTime': 4, 'scoreboardRound': 9}, observed_at=START + 9 * 4 + 0.3)
+    scheduler.observe({'start': start, 'roundTime': 4, 'scoreboardRound': 10}, observed_at=START + 10 * 4 + 0.3)
+    assert scheduler.offset is None
+
+def test_rollover_time_only_for_observed_rollovers():
+    scheduler = TickScheduler()
+    start = datetime.fromtimestamp(START, timezone.utc).isoformat().replace('+00:00', 'Z')
+    # Il round 5 era già in corso all'avvio: il suo cambio non è stato visto
+    scheduler.observe({'start': start, 'roundTime': ROUND_TIME, 'scoreboardRound': 5}, observed_at=START + 5 * ROUND_TIME + 90)
+    assert scheduler.rollover_time(5) is None
+    scheduler.observe({'start': start, 'roundTime': ROUND_TIME, 'scoreboardRound': 6}, observed_at=START + 6 * ROUND_TIME + 0.5)
+    assert scheduler.rollover_time(6) == pytest.approx(START + 6 * ROUND_TIME, abs=1.0)
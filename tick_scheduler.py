@@ -0,0 +1,165 @@
+# scoreboard_monitor/tick_scheduler.py
+
+import time
+from datetime import datetime
+from typing import Callable, Dict, Any
+
+from config import (
+    DEFAULT_TICK_DURATION_SECONDS, TICK_POLL_WINDOW_SECONDS,
+    TICK_DENSE_POLL_INTERVAL_SECONDS, TICK_MAX_POLL_INTERVAL_SECONDS
+)
+
+# Peso delle nuove osservazioni nella media mobile esponenziale dello sfasamento
+_OFFSET_SMOOTHING = 0.5
+# Margine sull'intervallo massimo tra due poll entro cui un passaggio di round è ancora una misura
+# utile: i poll distano max_interval più la durata della richiesta e l'elaborazione del ciclo
+_GAP_TOLERANCE = 1.5
+
+def _parse_timestamp(value: str | None) -> float | None:
+    """Converte un timestamp ISO 8601 dell'API in secondi epoch."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+class TickScheduler:
+    """
+    Stima gli istanti di cambio round a partire da `start`, `roundTime` e dai passaggi di
+    `scoreboardRound` osservati, e decide quando interrogare `/status`: dorme fino a poco prima
+    del cambio previsto, interroga fittamente in una finestra attorno ad esso e poi rallenta.
+    Finché non è stato misurato alcun passaggio la previsione usa il cambio nominale
+    start + round * roundTime (sfasamento nullo), così già il primo viene racchiuso da poll fitti.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = TICK_POLL_WINDOW_SECONDS,
+        dense_interval: float = TICK_DENSE_POLL_INTERVAL_SECONDS,
+        max_interval: float = TICK_MAX_POLL_INTERVAL_SECONDS
+    ):
+        self.window_seconds = window_seconds
+        self.dense_interval = dense_interval
+        self.max_interval = max_interval
+        self.start_time = None
+        self.round_time = float(DEFAULT_TICK_DURATION_SECONDS)
+        # Sfasamento (s) tra il cambio nominale start + round * roundTime e quello osservato (None finché non misurato)
+        self.offset = None
+        self.last_round = None
+        # Ultimo round il cui passaggio è stato visto dallo scheduler (poll precedente sul round prima)
+        self._observed_rollover = None
+        self._last_poll_time = None
+        self._overdue_polls = 0
+
+    def observe(self, status_data: Dict[str, Any], observed_at: float | None = None):
+        """Registra una risposta di `/status` e aggiorna la stima dello sfasamento."""
+        if not status_data:
+            return
+        observed_at = time.time() if observed_at is None else observed_at
+        start_time = _parse_timestamp(status_data.get('start'))
+        if start_time is not None:
+            self.start_time = start_time
+        if status_data.get('roundTime'):
+            self.round_time = float(status_data['roundTime'])
+
+        new_round = status_data.get('scoreboardRound')
+        if new_round is None:
+            return
+        if self.last_round is not None and new_round > self.last_round:
+            self._overdue_polls = 0
+            if new_round == self.last_round + 1:
+                self._observed_rollover = new_round
+            # Solo un passaggio di un singolo round tra due poll ravvicinati è una misura affidabile
+            if (new_round == self.last_round + 1 and self._last_poll_time is not None
+                    and observed_at - self._last_poll_time <= self._max_measurable_gap()):
+                transition = (self._last_poll_time + observed_at) / 2
+                self._update_offset(new_round, transition)
+            else:
+                self._bound_offset(new_round, observed_at)
+        self.last_round = new_round
+        self._last_poll_time = observed_at
+
+    def _update_offset(self, round_number: int, transition: float):
+        nominal = self._nominal_rollover(round_number)
+        if nominal is None:
+            return
+        measured = transition - nominal
+        if self.offset is None:
+            self.offset = measured
+        else:
+            self.offset += _OFFSET_SMOOTHING * (measured - self.offset)
+
+    def _max_measurable_gap(self) -> float:
+        """
+        Distanza massima tra due poll perché il punto medio sia una stima utile del cambio: l'errore
+        è al più metà della distanza, che deve restare piccola anche rispetto alla durata del round.
+        """
+        return min(self.max_interval * _GAP_TOLERANCE, self.round_time / 4)
+
+    def _bound_offset(self, round_number: int, observed_at: float):
+        """
+        Il passaggio è avvenuto prima di `observed_at`, ma i poll sono troppo distanti per misurarlo:
+        se la previsione lo collocava più tardi viene anticipata, così al round successivo la
+        finestra di poll fitti lo racchiude.
+        """
+        nominal = self._nominal_rollover(round_number)
+        if nominal is None:
+            return
+        latest = observed_at - nominal
+        if (self.offset or 0.0) > latest:
+            self.offset = latest - self.window_seconds
+
+    def _nominal_rollover(self, round_number: int) -> float | None:
+        if self.start_time is None:
+            return None
+        return self.start_time + round_number * self.round_time
+
+    def predicted_rollover(self, round_number: int) -> float | None:
+        """Istante (epoch) previsto in cui `scoreboardRound` raggiungerà `round_number`."""
+        nominal = self._nominal_rollover(round_number)
+        if nominal is None:
+            return None
+        return nominal + (self.offset or 0.0)
+
+    def rollover_time(self, round_number: int) -> float | None:
+        """
+        Istante stimato del cambio a `round_number`, solo se lo scheduler ne ha visto il passaggio
+        dal round precedente: None per un round già in corso all'avvio (cambiato in un momento
+        ignoto, fino a un intero round prima) o se `start` non è noto.
+        """
+        if round_number != self._observed_rollover:
+            return None
+        return self.predicted_rollover(round_number)
+
+    def next_poll_delay(self, target_round: int, now: float | None = None) -> float:
+        """Secondi da attendere prima del prossimo poll di `/status` per rilevare `target_round`."""
+        now = time.time() if now is None else now
+        predicted = self.predicted_rollover(target_round)
+        if predicted is None:
+            # Inizio della partita sconosciuto: si interroga a ritmo fisso
+            return self.max_interval
+        remaining = predicted - now
+        if remaining > self.window_seconds:
+            return remaining - self.window_seconds
+        if remaining > -self.window_seconds:
+            return self.dense_interval
+        # Il cambio è in ritardo rispetto alla previsione: backoff esponenziale
+        self._overdue_polls += 1
+        return min(self.max_interval, self.dense_interval * (2 ** self._overdue_polls))
+
+    def wait_for_round(
+        self,
+        target_round: int,
+        fetch_status: Callable[[], Dict[str, Any] | None],
+        sleep: Callable[[float], None] = time.sleep
+    ) -> Dict[str, Any]:
+        """Attende finché `scoreboardRound` non raggiunge `target_round` e restituisce lo stato."""
+        while True:
+            sleep(self.next_poll_delay(target_round))
+            sent_at = time.time()
+            status_data = fetch_status()
+            # Lo stato è stato letto dal server in un istante tra invio e risposta: se ne prende il punto medio
+            self.observe(status_data, (sent_at + time.time()) / 2)
+            if status_data and (status_data.get('scoreboardRound') or 0) >= target_round:
+                return status_data